@@ -44,7 +44,7 @@ class mainWindow(qwid.QMainWindow):
     def __init__(self):
         super().__init__()
 
-        self.setFixedSize(427, 550)
+        self.setFixedSize(427, 600)
         self.initUI()
 
     def initUI(self):
@@ -55,7 +55,9 @@ class mainWindow(qwid.QMainWindow):
 
         self.gsCBox = qwid.QComboBox(self)
         self.gsCBox.setToolTip("<p>Grid should have 2^n + 1 points to enable restriction and prolongation during V-Cycles<\p>")
-        for i in range(2, 15):
+        # Sizes go up to 2^27 + 1 points. The memory needed for the chosen size is reported in the console window,
+        # and the solver refuses to run if it is more than the memory available.
+        for i in range(2, 28):
             n = 2**i + 1
             self.gsCBox.addItem(str(n))
         self.gsCBox.currentIndexChanged.connect(self.gsCBoxSelection)
@@ -113,17 +115,30 @@ class mainWindow(qwid.QMainWindow):
         self.tolLEdit.setAlignment(qcore.Qt.AlignRight)
         self.tolLEdit.move(295, 275)
 
+        # Widgets to choose the smoother
+        smLabel = qwid.QLabel("Smoother used in V-Cycles", self)
+        smLabel.resize(smLabel.sizeHint())
+        smLabel.move(32, 332)
+
+        self.smCBox = qwid.QComboBox(self)
+        self.smCBox.setToolTip("<p>Jacobi and Chebyshev smoothers update all points at once, and are much faster on large grids, though they need a few more V-Cycles<\p>")
+        # The items are in the same order as the choices of smType in mgLite.py
+        for smName in ["Gauss-Seidel", "Red-black GS", "Jacobi", "Chebyshev"]:
+            self.smCBox.addItem(smName)
+        self.smCBox.resize(120, self.smCBox.sizeHint().height())
+        self.smCBox.move(275, 325)
+
         # A Frame widget containing widgets to enable or disable non-uniform grid
         nuFrame = qwid.QFrame(self)
         nuFrame.setFrameStyle(qwid.QFrame.StyledPanel)
         nuFrame.resize(375, 46)
-        nuFrame.move(25, 322)
+        nuFrame.move(25, 372)
 
         # Check box to enable non-uniform grid
         self.nugChBox = qwid.QCheckBox("Enable non-uniform grid", self)
         self.nugChBox.setToolTip("<p>Use a tangent-hyperbolic grid which is fine near the boundaries and coarse at the center of the domain<\p>")
         self.nugChBox.resize(self.nugChBox.sizeHint())
-        self.nugChBox.move(40, 335)
+        self.nugChBox.move(40, 385)
         self.nugChBox.stateChanged.connect(self.nuGridCheck)
 
         # Widgets to get the tangent-hyperbolic grid stretching factor, beta
@@ -131,41 +146,41 @@ class mainWindow(qwid.QMainWindow):
         self.betLabel.setToolTip("<nobr>Stretching parameter for <\nobr>tangent-hyperbolic grid")
         self.betLabel.resize(self.betLabel.sizeHint())
         self.betLabel.setEnabled(False)
-        self.betLabel.move(275, 337)
+        self.betLabel.move(275, 387)
 
         self.betLEdit = qwid.QLineEdit("0.5", self)
         self.betLEdit.setToolTip("<p>Must be a floating point number greater than 0, but not greater than 3<\p>")
         self.betLEdit.setAlignment(qcore.Qt.AlignRight)
         self.betLEdit.setEnabled(False)
         self.betLEdit.resize(70, 30)
-        self.betLEdit.move(322, 330)
+        self.betLEdit.move(322, 380)
 
         # A few check boxes to decide what should be plotted
         self.solChBox = qwid.QCheckBox("Plot computed and analytical solution", self)
         self.solChBox.resize(self.solChBox.sizeHint())
-        self.solChBox.move(30, 382)
+        self.solChBox.move(30, 432)
 
         self.errChBox = qwid.QCheckBox("Plot error in computed solution", self)
         self.errChBox.resize(self.errChBox.sizeHint())
-        self.errChBox.move(30, 412)
+        self.errChBox.move(30, 462)
 
         self.conChBox = qwid.QCheckBox("Plot convergence of residual", self)
         self.conChBox.resize(self.conChBox.sizeHint())
         self.conChBox.setToolTip("<p>To plot residual convergence, we need at least 3 V-Cycles<\p>")
         self.conChBox.setEnabled(False)
-        self.conChBox.move(30, 442)
+        self.conChBox.move(30, 492)
 
         # Start button - to start the simulation :)
         startButton = qwid.QPushButton('Start', self)
         startButton.clicked.connect(self.startSolver)
         startButton.resize(startButton.sizeHint())
-        startButton.move(180, 490)
+        startButton.move(180, 540)
 
         # Quit button - to quit the program :(
         quitButton = qwid.QPushButton('Quit', self)
         quitButton.clicked.connect(self.close)
         quitButton.resize(quitButton.sizeHint())
-        quitButton.move(300, 490)
+        quitButton.move(300, 540)
 
         # Window title and icon
         self.setWindowTitle('MG-Lite')
@@ -201,10 +216,12 @@ class mainWindow(qwid.QMainWindow):
             self.betLabel.setEnabled(False)
             self.betLEdit.setEnabled(False)
 
-    # This function interfaces with the multi-grid solver and sets its parameters.
+    # This function collects the parameters of the multi-grid solver.
     # These parameters are read from the inputs given in the window.
     # It then opens the console window and hands the baton to it.
     def startSolver(self):
+        mgParams = {}
+
         tolValue = 0.0
         # Check if tolerance specified is valid
         try:
@@ -214,8 +231,8 @@ class mainWindow(qwid.QMainWindow):
             return 1
 
         # Check if uniform grid flag is enabled
-        mgSolver.nuFlag = self.nugChBox.isChecked()
-        if mgSolver.nuFlag:
+        mgParams['nuFlag'] = self.nugChBox.isChecked()
+        if mgParams['nuFlag']:
             betValue = 0.0
             # Check if beta value specified is valid
             try:
@@ -234,20 +251,28 @@ class mainWindow(qwid.QMainWindow):
                 return 1
 
             # If both above checks are passed, have no fear! Set the value of beta.
-            mgSolver.beta = betValue
+            mgParams['beta'] = betValue
 
         # Now set all the other less complicated parameters
-        mgSolver.sInd = int(self.gsCBox.currentIndex()) + 2
+        mgParams['sInd'] = int(self.gsCBox.currentIndex()) + 2
+
+        mgParams['VDepth'] = self.vdSBox.value()
+        mgParams['vcCnt'] = self.vcSBox.value()
+        mgParams['preSm'] = self.preSBox.value()
+        mgParams['pstSm'] = self.pstSBox.value()
 
-        mgSolver.VDepth = self.vdSBox.value()
-        mgSolver.vcCnt = self.vcSBox.value()
-        mgSolver.preSm = self.preSBox.value()
-        mgSolver.pstSm = self.pstSBox.value()
+        mgParams['tolerance'] = tolValue
 
-        mgSolver.tolerance = tolValue
+        mgParams['smType'] = mgSolver.paramChoices['smType'][self.smCBox.currentIndex()]
+
+        # Close the console window of any previous run before opening a new one
+        try:
+            self.cWindow.close()
+        except:
+            pass
 
         # Open console window and run the solver
-        self.cWindow = consoleWindow(self.solChBox, self.errChBox, self.conChBox)
+        self.cWindow = consoleWindow(mgParams, self.solChBox, self.errChBox, self.conChBox)
         self.cWindow.runSolver()
 
     # Clingy function for a clingy app - makes sure that the user wants to quit the app
@@ -264,18 +289,69 @@ class mainWindow(qwid.QMainWindow):
         else:
             event.ignore()
 
+################################ SOLVER WORKER ##################################
+
+# The MG solver runs inside this object, which is moved to a separate thread by the console window.
+# The solver sees it as its console, and all output is sent to the GUI thread through signals.
+class solverWorker(qcore.QObject):
+    textOut = qcore.pyqtSignal(str)
+    cycleDone = qcore.pyqtSignal(int)
+    finished = qcore.pyqtSignal()
+
+    def __init__(self, mgParams):
+        super().__init__()
+
+        self.mgParams = mgParams
+        self.mgRun = None
+        self.stopFlag = False
+        self.runFail = False
+
+    # Create the MG solver and run it. This is called when the worker thread starts.
+    # Any error in the solver is reported in the console window, and finished is always emitted,
+    # so that the window and its thread don't wait forever for a solver that has died.
+    def run(self):
+        try:
+            if not self.stopFlag:
+                self.mgRun = mgSolver.multigridSolver(self, **self.mgParams)
+                self.mgRun.cycleHook = lambda cNum, resVal: self.cycleDone.emit(cNum)
+                if self.stopFlag:
+                    self.mgRun.cancel()
+
+                self.mgRun.run()
+        except Exception as runErr:
+            self.runFail = True
+            self.textOut.emit("ERROR! The solver stopped with {0:s}: {1:s}\n".format(type(runErr).__name__, str(runErr)))
+        finally:
+            self.finished.emit()
+
+    # This is called from the GUI thread, and the solver stops at the end of its current cycle
+    def cancel(self):
+        self.stopFlag = True
+        if self.mgRun:
+            self.mgRun.cancel()
+
+    # The solver calls this function instead of print(), and the string is passed on to the GUI thread
+    def updateTEdit(self, cOutString):
+        self.textOut.emit(cOutString)
+
 ############################### CONSOLE WINDOW ##################################
 
 class consoleWindow(qwid.QMainWindow):
-    def __init__(self, sCBox, eCBox, rCBox):
+    def __init__(self, mgParams, sCBox, eCBox, rCBox):
         super().__init__()
 
+        # Parameters with which the multi-grid solver will be created
+        self.mgParams = mgParams
+
         # Three boolean flags for the three check boxes in the main window for plots
         self.sPlot = sCBox.isChecked()
         self.ePlot = eCBox.isChecked()
         self.rPlot = rCBox.isChecked()
 
-        self.setFixedSize(400, 400)
+        # Output of the solver is collected here and written to the text box at fixed intervals
+        self.textBuffer = []
+
+        self.setFixedSize(400, 440)
         self.initUI()
 
     def initUI(self):
@@ -284,23 +360,33 @@ class consoleWindow(qwid.QMainWindow):
         self.conTEdit.resize(340, 300)
         self.conTEdit.move(30, 30)
 
+        # Progress bar showing the number of cycles completed
+        self.cycPBar = qwid.QProgressBar(self)
+        self.cycPBar.setMaximum(self.mgParams['vcCnt'])
+        self.cycPBar.setValue(0)
+        self.cycPBar.resize(340, 25)
+        self.cycPBar.move(30, 345)
+
+        # Cancel button - to stop the solver midway
+        self.cancelButton = qwid.QPushButton('Cancel', self)
+        self.cancelButton.clicked.connect(self.cancelSolver)
+        self.cancelButton.resize(self.cancelButton.sizeHint())
+        self.cancelButton.move(55, 390)
+
         # Plot button
-        plotButton = qwid.QPushButton('Plot', self)
-        plotButton.clicked.connect(self.plotSolution)
-        plotButton.resize(plotButton.sizeHint())
-        plotButton.move(165, 350)
-
-        # The plot button will be disabled if none of the check boxes in main window are checked
-        if (self.sPlot or self.ePlot or self.rPlot):
-            plotButton.setEnabled(True)
-        else:
-            plotButton.setEnabled(False)
+        self.plotButton = qwid.QPushButton('Plot', self)
+        self.plotButton.clicked.connect(self.plotSolution)
+        self.plotButton.resize(self.plotButton.sizeHint())
+        self.plotButton.move(165, 390)
+
+        # The plot button stays disabled till the solver is done
+        self.plotButton.setEnabled(False)
 
         # Close button
         closeButton = qwid.QPushButton('Close', self)
         closeButton.clicked.connect(self.close)
         closeButton.resize(closeButton.sizeHint())
-        closeButton.move(275, 350)
+        closeButton.move(275, 390)
 
         # Window title and icon
         self.setWindowTitle('MG-Lite Console Output')
@@ -309,27 +395,96 @@ class consoleWindow(qwid.QMainWindow):
         # Reveal thyself
         self.show()
 
-    # As the function name says, it calls the main() of the MG solver
+    # As the function name says, it creates an MG solver and runs it.
+    # The solver runs in a separate thread so that the window remains responsive.
+    # The thread belongs to the application and not to this window, which may be closed and let go of before
+    # the solver stops. Both the thread and the worker delete themselves once the solver is done.
+    # The worker ends the event loop of its thread directly, so that the application can wait for the thread
+    # when it quits, without needing its own event loop.
     def runSolver(self):
-        mgSolver.main(self)
-        qwid.QApplication.processEvents()
+        self.mgRun = None
+
+        mgApp = qwid.QApplication.instance()
+        self.solThread = qcore.QThread(mgApp)
+        self.solWorker = solverWorker(self.mgParams)
+        self.solWorker.moveToThread(self.solThread)
 
-    # This function is called by the MG solver at all places where it normally uses the print()
-    # command. The string passed to the print command is instead passed to this function,
-    # which sends it to the text box of the console window.
+        self.solWorker.textOut.connect(self.updateTEdit)
+        self.solWorker.cycleDone.connect(self.cycPBar.setValue)
+        if self.rPlot:
+            self.solWorker.cycleDone.connect(self.plotLive)
+        self.solWorker.finished.connect(self.solverDone)
+        self.solWorker.finished.connect(self.solThread.quit, qcore.Qt.DirectConnection)
+        self.solWorker.finished.connect(self.solWorker.deleteLater)
+        self.solThread.finished.connect(self.solThread.deleteLater)
+        self.solThread.started.connect(self.solWorker.run)
+
+        # A solver still running when the application quits is stopped at the end of its current cycle, and waited for
+        solWorker, solThread = self.solWorker, self.solThread
+        def stopOnQuit():
+            solWorker.cancel()
+            solThread.wait()
+
+        quitWait = mgApp.aboutToQuit.connect(stopOnQuit)
+        solThread.finished.connect(lambda: mgApp.aboutToQuit.disconnect(quitWait))
+
+        # Text from the solver is flushed to the text box 10 times a second
+        self.textTimer = qcore.QTimer(self)
+        self.textTimer.timeout.connect(self.flushText)
+        self.textTimer.start(100)
+
+        self.solThread.start()
+
+    # This function receives all the strings that the MG solver would normally print.
+    # They are buffered and written to the text box of the console window by flushText().
     def updateTEdit(self, cOutString):
-        self.conTEdit.append(cOutString)
-        qwid.QApplication.processEvents()
+        self.textBuffer.append(cOutString)
+
+    # Write all the buffered output of the solver to the text box in one go
+    def flushText(self):
+        if self.textBuffer:
+            self.conTEdit.append("\n".join(self.textBuffer))
+            self.textBuffer = []
+
+    # This function is called when the solver thread is done, either normally or after being cancelled
+    def solverDone(self):
+        self.textTimer.stop()
+        self.flushText()
+
+        self.mgRun = self.solWorker.mgRun
+        self.cancelButton.setEnabled(False)
+
+        # The plot button will be disabled if none of the check boxes in main window are checked,
+        # or if the solver failed, since there is nothing to plot then
+        if (self.sPlot or self.ePlot or self.rPlot) and not self.solWorker.runFail:
+            self.plotButton.setEnabled(True)
+
+    # The residual plot is updated after every cycle while the solver runs.
+    # This is done here and not in the worker thread, since plots can be drawn only from the GUI thread.
+    def plotLive(self, cNum):
+        self.solWorker.mgRun.plotResidual(cNum)
+
+    # This function is called by the 'Cancel' button when clicked
+    def cancelSolver(self):
+        self.solWorker.cancel()
+        self.cancelButton.setEnabled(False)
+
+    # Ask the solver to stop, and close the window without waiting for it.
+    # The solver stops at the end of its current cycle, after which its thread ends by itself.
+    def closeEvent(self, event):
+        self.solWorker.cancel()
+
+        event.accept()
 
     # This function is called by the 'Plot' button when clicked.
     # It merely calls the plotResult() function of the MG solver, with appropriate arguments.
     def plotSolution(self):
         if self.sPlot:
-            mgSolver.plotResult(0)
+            self.mgRun.plotResult(0)
         if self.ePlot:
-            mgSolver.plotResult(1)
+            self.mgRun.plotResult(1)
         if self.rPlot:
-            mgSolver.plotResult(2)
+            self.mgRun.plotResult(2)
 
 
 ############################## THAT'S IT, FOLKS!! ###############################
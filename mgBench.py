@@ -0,0 +1,291 @@
+#!/usr/bin/python3
+
+#################################################################################
+# MG-Lite
+#
+# Copyright (C) 2020, Roshan J. Samuel
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     1. Redistributions of source code must retain the above copyright
+#        notice, this list of conditions and the following disclaimer.
+#     2. Redistributions in binary form must reproduce the above copyright
+#        notice, this list of conditions and the following disclaimer in the
+#        documentation and/or other materials provided with the distribution.
+#     3. Neither the name of the copyright holder nor the
+#        names of its contributors may be used to endorse or promote products
+#        derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#################################################################################
+
+# Import all necessary modules
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+import mgLite as mgSolver
+
+############################### GLOBAL CONSTANTS ################################
+
+# Size indices of the grids that are benchmarked, where the grid has 2^sInd + 1 points.
+# Each size is run on a uniform grid and on a tan-hyp stretched grid.
+benchSizes = list(range(2, 15))
+
+# Parameters of the solver used in all runs. The depth of each V-cycle is always sInd - 1,
+# so that the coarsest level has 3 points. Parameters that are not listed take the default
+# values set in mgLite.py
+benchParams = {'vcCnt': 10,
+               'beta': 1.0}
+
+# Each kernel is called repeatedly until its calls add up to at least minTime seconds, and at least minCalls times.
+# The median of the calls is taken as its time, and their interquartile range as its spread.
+minTime = 0.5
+minCalls = 5
+
+# Name of the file to which the results are written
+jsonName = "mgBench.json"
+
+# A result is flagged as a regression if it is worse than the baseline by more than these fractions.
+# Differences in time smaller than timeFloor seconds, or than noiseFac times the sum of the spreads
+# of both runs, are ignored, since they are lost in the noise.
+timeTol = 0.25
+timeFloor = 1.0e-3
+noiseFac = 3.0
+memTol = 0.1
+cfTol = 0.05
+
+# Kernels of the solver that are timed, apart from full runs of multigrid()
+kernelList = ['initGrid', 'smooth', 'calcResidual', 'restrict', 'prolong', 'solve']
+
+##################################### MAIN ######################################
+
+def main():
+    cParser = argparse.ArgumentParser(description="Benchmark the kernels and full runs of MG-Lite.")
+    cParser.add_argument('--sInd', type=int, nargs='+', default=benchSizes, help="size indices of the grids to run (default: %(default)s)")
+    cParser.add_argument('--grids', nargs='+', default=['uniform', 'stretched'], choices=['uniform', 'stretched'], help="kinds of grids to run")
+    cParser.add_argument('--output', metavar='FILE', default=jsonName, help="write the results as JSON to FILE (default: %(default)s)")
+    cParser.add_argument('--baseline', metavar='FILE', help="compare the results with those saved in FILE, and flag regressions")
+    cArgs = cParser.parse_args()
+
+    nuList = [x == 'stretched' for x in cArgs.grids]
+    benchData = runBench(cArgs.sInd, nuList, benchParams)
+
+    with open(cArgs.output, 'w') as oFile:
+        json.dump(benchData, oFile, indent=4)
+        oFile.write("\n")
+
+    print("Results of benchmark written to " + cArgs.output)
+
+    if cArgs.baseline:
+        with open(cArgs.baseline) as bFile:
+            baseData = json.load(bFile)
+
+        regList = compareBench(baseData, benchData)
+        printRegressions(regList)
+
+        return 1 if regList else 0
+
+    return 0
+
+
+# Run the benchmark for every size in sizeList and every value of nuFlag in nuList.
+# The results are returned as a dictionary that can be written as JSON.
+def runBench(sizeList, nuList, mgParams):
+    caseList = []
+    for sInd in sizeList:
+        for nuFlag in nuList:
+            caseRes = benchCase(dict(mgParams, sInd=sInd, VDepth=sInd-1, nuFlag=nuFlag))
+            caseList.append(caseRes)
+
+            printCase(caseRes)
+
+    return {'params': mgParams,
+            'machine': {'python': platform.python_version(),
+                        'numpy': np.__version__,
+                        'processor': platform.processor() or platform.machine()},
+            'cases': caseList}
+
+
+# Solve the test case with the given parameters, time each of its kernels, and measure its peak memory
+def benchCase(mgParams):
+    oConsole = mgSolver.textConsole(None)
+
+    # The cache is cleared so that the setup time includes building the grid hierarchy
+    mgSolver.hierCache.clear()
+
+    t0 = time.perf_counter()
+    mgRun = mgSolver.multigridSolver(oConsole, **mgParams)
+    t1 = time.perf_counter()
+
+    # The test case is solved repeatedly like the kernels, each time starting from zero
+    mgRHS = np.ones(mgRun.N[0] + 2)
+    solveTime, solveSpread, solveCalls = timeKernel(lambda: mgRun.multigrid(mgRHS), lambda: mgRun.pSoln.fill(0.0))
+
+    # The geometric mean of the ratio of residuals of successive cycles
+    cFact = mgRun.cFact[mgRun.cFact > 0.0]
+    cfMean = float(np.exp(np.mean(np.log(cFact)))) if len(cFact) else np.nan
+
+    nCyc = len(mgRun.rConv)
+    caseRes = {'sInd': mgParams['sInd'],
+               'nuFlag': mgParams['nuFlag'],
+               'gridSize': mgRun.N[0],
+               'levels': len(mgRun.N),
+               'setupTime': t1 - t0,
+               'solveTime': solveTime,
+               'solveSpread': solveSpread,
+               'solveCalls': solveCalls,
+               'cycles': nCyc,
+               'cycleTime': solveTime/nCyc if nCyc else np.nan,
+               'cycleSpread': solveSpread/nCyc if nCyc else np.nan,
+               'timePerPoint': solveTime/nCyc/mgRun.N[0] if nCyc else np.nan,
+               'convFactor': cfMean,
+               'errVal': float(mgRun.computeError(mgRun.pSoln)),
+               'kernels': benchKernels(mgRun),
+               'peakMem': peakMemory(oConsole, mgParams)}
+
+    return caseRes
+
+
+# Time each kernel in kernelList on the solver mgRun, which has already solved the test case.
+# The kernels are timed at the finest level, except solve(), which works only at the coarsest level.
+def benchKernels(mgRun):
+    lMax = len(mgRun.N) - 1
+
+    # Each kernel works at the level given by vLev, and some of them move it to the next level.
+    # So vLev is set before every call, along with any other data that the kernel overwrites.
+    def setLevel(vLev):
+        mgRun.vLev = vLev
+
+    def resetSolve():
+        mgRun.vLev = lMax
+        mgRun.pData[lMax].fill(0.0)
+        mgRun.rData[lMax].fill(1.0)
+
+    kernelRuns = {'initGrid': (mgRun.initGrid, mgSolver.hierCache.clear, 0),
+                  'smooth': (lambda: mgRun.smooth(1), lambda: setLevel(0), 0),
+                  'calcResidual': (mgRun.calcResidual, lambda: setLevel(0), 0),
+                  'restrict': (mgRun.restrict, lambda: setLevel(0), 0),
+                  'prolong': (mgRun.prolong, lambda: setLevel(1), 0),
+                  'solve': (mgRun.solve, resetSolve, lMax)}
+
+    kernelRes = {}
+    for kName in kernelList:
+        kFunc, kReset, vLev = kernelRuns[kName]
+        kTime, kSpread, kCalls = timeKernel(kFunc, kReset)
+        kernelRes[kName] = {'level': vLev,
+                            'time': kTime,
+                            'spread': kSpread,
+                            'timePerPoint': kTime/mgRun.N[vLev],
+                            'calls': kCalls}
+
+    return kernelRes
+
+
+# Call kFunc repeatedly, with kReset called before each call but not timed, and return the median
+# and interquartile range of the time taken by a call, along with the number of calls.
+# The median is not thrown off by the odd call that is slowed down by the rest of the machine.
+def timeKernel(kFunc, kReset):
+    tList, tSum = [], 0.0
+    while tSum < minTime or len(tList) < minCalls:
+        kReset()
+
+        tStart = time.perf_counter()
+        kFunc()
+        tCall = time.perf_counter() - tStart
+
+        tList.append(tCall)
+        tSum += tCall
+
+    tLow, tMed, tHigh = np.percentile(tList, [25, 50, 75])
+
+    return float(tMed), float(tHigh - tLow), len(tList)
+
+
+# Peak memory, in bytes, allocated while creating a solver and running a cycle with the given parameters.
+# All arrays are allocated before the first cycle, so a single cycle is enough.
+# This is done separately from the timed runs, since tracing the memory slows down the solver.
+def peakMemory(oConsole, mgParams):
+    mgSolver.hierCache.clear()
+
+    tracemalloc.start()
+    try:
+        mgRun = mgSolver.multigridSolver(oConsole, **dict(mgParams, vcCnt=1))
+        mgRun.multigrid(np.ones(mgRun.N[0] + 2))
+
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# Print the results of a case as a single line
+def printCase(caseRes):
+    print("sInd = {0:2d}, {1:9s}: {2:2d} cycles, convergence factor {3:.4f}, {4:.4e} s per cycle, {5:.4e} s per point, peak memory {6:.2f} MB".format(
+          caseRes['sInd'], 'stretched' if caseRes['nuFlag'] else 'uniform', caseRes['cycles'], caseRes['convFactor'],
+          caseRes['cycleTime'], caseRes['timePerPoint'], caseRes['peakMem']/2**20))
+
+
+# Compare the results in benchData with those in baseData, for the cases present in both.
+# A list of regressions is returned, each of which is a tuple of the case, the quantity, and its old and new values.
+def compareBench(baseData, benchData):
+    baseCases = {(x['sInd'], x['nuFlag']): x for x in baseData['cases']}
+
+    regList = []
+    for caseRes in benchData['cases']:
+        cKey = (caseRes['sInd'], caseRes['nuFlag'])
+        if cKey not in baseCases:
+            continue
+
+        baseRes = baseCases[cKey]
+
+        # Baselines saved before the spread was recorded are taken to have none
+        tList = [('cycleTime', baseRes['cycleTime'], caseRes['cycleTime'], baseRes.get('cycleSpread', 0.0) + caseRes['cycleSpread'])]
+        for kName in kernelList:
+            if kName in baseRes['kernels']:
+                oldRes, newRes = baseRes['kernels'][kName], caseRes['kernels'][kName]
+                tList.append((kName, oldRes['time'], newRes['time'], oldRes.get('spread', 0.0) + newRes['spread']))
+
+        for qName, oldVal, newVal, tSpread in tList:
+            if newVal - oldVal > max(timeTol*oldVal, timeFloor, noiseFac*tSpread):
+                regList.append((cKey, qName, oldVal, newVal))
+
+        if caseRes['convFactor'] > baseRes['convFactor']*(1.0 + cfTol):
+            regList.append((cKey, 'convFactor', baseRes['convFactor'], caseRes['convFactor']))
+
+        if caseRes['peakMem'] > baseRes['peakMem']*(1.0 + memTol):
+            regList.append((cKey, 'peakMem', baseRes['peakMem'], caseRes['peakMem']))
+
+    return regList
+
+
+def printRegressions(regList):
+    if not regList:
+        print("No regressions with respect to baseline")
+        return
+
+    print("\n{0:d} regression(s) with respect to baseline:".format(len(regList)))
+    print("{0:>4s}  {1:<9s}  {2:<14s} {3:>12s} {4:>12s} {5:>8s}".format("sInd", "Grid", "Quantity", "Baseline", "Current", "Change"))
+    for cKey, qName, oldVal, newVal in regList:
+        print("{0:4d}  {1:<9s}  {2:<14s} {3:12.4e} {4:12.4e} {5:+7.1f}%".format(
+              cKey[0], 'stretched' if cKey[1] else 'uniform', qName, oldVal, newVal, 100.0*(newVal/oldVal - 1.0)))
+
+
+############################## THAT'S IT, FOLKS!! ###############################
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#################################################################################
+# MG-Lite
+#
+# Copyright (C) 2020, Roshan J. Samuel
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     1. Redistributions of source code must retain the above copyright
+#        notice, this list of conditions and the following disclaimer.
+#     2. Redistributions in binary form must reproduce the above copyright
+#        notice, this list of conditions and the following disclaimer in the
+#        documentation and/or other materials provided with the distribution.
+#     3. Neither the name of the copyright holder nor the
+#        names of its contributors may be used to endorse or promote products
+#        derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#################################################################################
+
+# Kernels of the multigrid solver in mgLite.py, compiled with Numba.
+# This module is imported by mgLite.py only if Numba is installed, and the solver uses the NumPy
+# versions of these kernels otherwise.
+#
+# Each kernel computes exactly the same operations, in the same order, as its NumPy version
+# in mgLite.py, so that both give identical results. verifyBackend() in mgLite.py checks this.
+# In mixed precision mode, the arrays are in single precision, while the grid spacings are not.
+# The kernels then compute in double precision before they store the result, and may differ from NumPy in the last bit.
+# All arrays are 2D, with one row for each RHS of a batch, and the grid index along the rows.
+# Compiled kernels are cached on disk, so that they are compiled only once.
+
+# Import all necessary modules
+import numba
+
+############################## GAUSS-SEIDEL SWEEPS ##############################
+
+# Lexicographic Gauss-Seidel sweep on uniform grid
+@numba.njit(cache=True)
+def gsSweepUniform(P, R, hx2):
+    for b in range(P.shape[0]):
+        for j in range(1, P.shape[1] - 1):
+            P[b, j] = (P[b, j+1] + P[b, j-1] - hx2*R[b, j-1])*0.5
+
+
+# Lexicographic Gauss-Seidel sweep on tangent-hyperbolic grid, with the metric terms xixx and xix2
+@numba.njit(cache=True)
+def gsSweepStretched(P, R, xixx, xix2, hx, hx2):
+    for b in range(P.shape[0]):
+        for j in range(1, P.shape[1] - 1):
+            P[b, j] = (xix2[j-1]*(P[b, j+1] + P[b, j-1])*2.0 +
+                       xixx[j-1]*(P[b, j+1] - P[b, j-1])*hx -
+                       R[b, j-1]*2.0*hx2) / (4.0*xix2[j-1])
+
+
+# Lexicographic Gauss-Seidel sweep with the update P = cW*P_west + cE*P_east + cR*R
+@numba.njit(cache=True)
+def gsSweepCoef(P, R, cW, cE, cR):
+    for b in range(P.shape[0]):
+        for j in range(1, P.shape[1] - 1):
+            P[b, j] = cW[j-1]*P[b, j-1] + cE[j-1]*P[b, j+1] + cR[j-1]*R[b, j-1]
+
+
+# Red-black Gauss-Seidel sweep with the same update as above.
+# Odd indices (red) are updated first, then even indices (black).
+@numba.njit(cache=True)
+def rbgsSweep(P, R, cW, cE, cR):
+    for b in range(P.shape[0]):
+        for c in range(1, 3):
+            for j in range(c, P.shape[1] - 1, 2):
+                P[b, j] = cW[j-1]*P[b, j-1] + cE[j-1]*P[b, j+1] + cR[j-1]*R[b, j-1]
+
+
+################################## OPERATORS ####################################
+
+# Laplacian of F on uniform grid, written to L, which has no ghost points
+@numba.njit(cache=True)
+def laplaceUniform(F, L, hx2):
+    for b in range(F.shape[0]):
+        for j in range(L.shape[1]):
+            L[b, j] = (F[b, j+2] + F[b, j] - F[b, j+1] - F[b, j+1])/hx2
+
+
+# Laplacian of F with the 3-point stencil (aW, aC, aE), written to L
+@numba.njit(cache=True)
+def laplaceCoef(F, L, aW, aC, aE):
+    for b in range(F.shape[0]):
+        for j in range(L.shape[1]):
+            L[b, j] = aC[j]*F[b, j+1] + aW[j]*F[b, j] + aE[j]*F[b, j+2]
+
+
+# Full weighted restriction of I, which includes ghost points, to the RHS of the next coarser level, R
+@numba.njit(cache=True)
+def restrictFW(I, R):
+    for b in range(I.shape[0]):
+        for i in range(R.shape[1]):
+            R[b, i] = (I[b, 2*i] + I[b, 2*i+2] + I[b, 2*i+1] + I[b, 2*i+1])*0.25
+
+
+# Residual of P and R on the fine level, restricted by full weighting straight to the RHS of the coarser level, C.
+# This is the same as laplaceUniform() and restrictFW() above, with the residual at ghost points taken to be 0.
+# The residual at the fine points between coarse points is computed once, and used for both its coarse neighbours.
+@numba.njit(cache=True)
+def restrictResidualUniform(P, R, C, hx2):
+    n = C.shape[1]
+    for b in range(P.shape[0]):
+        rEast = 0.0
+        for i in range(n):
+            rWest, rEast = rEast, 0.0
+            j = 2*i
+            rCent = R[b, j] - (P[b, j+2] + P[b, j] - P[b, j+1] - P[b, j+1])/hx2
+            if i < n - 1:
+                j = 2*i + 1
+                rEast = R[b, j] - (P[b, j+2] + P[b, j] - P[b, j+1] - P[b, j+1])/hx2
+            C[b, i] = (rWest + rEast + rCent + rCent)*0.25
+
+
+# Same as above, with the 3-point stencil (aW, aC, aE) of laplaceCoef()
+@numba.njit(cache=True)
+def restrictResidualCoef(P, R, C, aW, aC, aE):
+    n = C.shape[1]
+    for b in range(P.shape[0]):
+        rEast = 0.0
+        for i in range(n):
+            rWest, rEast = rEast, 0.0
+            j = 2*i
+            rCent = R[b, j] - (aC[j]*P[b, j+1] + aW[j]*P[b, j] + aE[j]*P[b, j+2])
+            if i < n - 1:
+                j = 2*i + 1
+                rEast = R[b, j] - (aC[j]*P[b, j+1] + aW[j]*P[b, j] + aE[j]*P[b, j+2])
+            C[b, i] = (rWest + rEast + rCent + rCent)*0.25
+
+
+# Linear interpolation of the coarse level data, C, to the finer level, F. Both include ghost points.
+@numba.njit(cache=True)
+def prolongLinear(C, F):
+    n = C.shape[1] - 2
+    for b in range(C.shape[0]):
+        for i in range(n):
+            F[b, 2*i+1] = C[b, i+1]
+
+        for i in range(n-1):
+            F[b, 2*i+2] = (C[b, i+1] + C[b, i+2])*0.5
+
+
+# Dirichlet BC on P, where the wall value is pWall, as in imposeBC() of mgLite.py
+@numba.njit(cache=True)
+def dirichletBC(P, pWall, zeroBC):
+    for b in range(P.shape[0]):
+        if zeroBC:
+            P[b, 0] = -P[b, 2]
+            P[b, -1] = -P[b, -3]
+        else:
+            P[b, 0] = 2.0*pWall - P[b, 2]
+            P[b, -1] = 2.0*pWall - P[b, -3]
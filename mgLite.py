@@ -32,33 +32,66 @@
 #################################################################################
 
 # Import all necessary modules
+# matplotlib is imported only when plotting, so that the solver can run without a display
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import threading
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MaxNLocator
+
+# Kernels compiled with Numba are imported by loadKernels() only when a solver asks for them,
+# since importing Numba takes longer than all the rest. mgKernels is None until then, or if Numba isn't installed.
+mgKernels = None
+kernelsTried = False
 
 ############################### GLOBAL CONSTANTS ################################
 
 # All the values set below are merely default values.
-# They will be overwritten by the GUI with values specified by the user
-# when the 'Start' button in its main window is clicked.
+# Each instance of multigridSolver takes its own copy of these values, unless
+# other values are passed to it as keyword arguments while creating it.
 
-# Choose grid size as an index from below list
-# Size index: 0 1 2 3  4  5  6  7   8   9   10   11   12   13    14
-# Grid sizes: 2 3 5 9 17 33 65 129 257 513 1025 2049 4097 8193 16385
+# Choose grid size as an index from below list, where the grid has 2^sInd + 1 points
+# Size index: 0 1 2 3  4  5  6  7   8   9   10   11   12   13    14  ...
+# Grid sizes: 2 3 5 9 17 33 65 129 257 513 1025 2049 4097 8193 16385 ...
 sInd = 7
 
+# Number of points in the grid, if it is not of the form 2^n + 1. If 0, the size is set by sInd above.
+# Each coarser level has (n + 1)/2 points, rounded down, so levels with an even number of points
+# don't share their points with the next coarser level, and use interpolation to transfer data.
+nPts = 0
+
 # Flag to switch between uniform and non-uniform grid with tan-hyp stretching
 nuFlag = False
 
 # Stretching parameter for tangent-hyperbolic grid
 beta = 1.0
 
+# Flag to use Galerkin operators, R.A.P, at the coarser levels, instead of discretizing the equation again on each level.
+# These are consistent with the restriction and prolongation operators, and converge faster on strongly stretched grids.
+galFlag = False
+
 # Depth of each V-cycle in multigrid (ideally VDepth = sInd - 1)
 VDepth = 6
 
-# Number of V-cycles to be computed
+# Type of multigrid cycle
+# 'V': V-cycle, which visits each coarser level once
+# 'W': W-cycle, which visits each coarser level twice, recursively
+# 'F': F-cycle, which visits each coarser level with an F-cycle followed by a V-cycle
+cycType = 'V'
+
+# Maximum number of V-cycles to be computed
 vcCnt = 10
 
+# Absolute tolerance for residual of the solution. V-cycles stop once the residual falls below it
+resTol = 0.0
+
+# Tolerance for residual of the solution relative to the residual of initial guess
+relTol = 0.0
+
 # Number of iterations during pre-smoothing
 preSm = 3
 
@@ -68,433 +101,2124 @@ pstSm = 3
 # Tolerance value for iterative solver
 tolerance = 1.0e-6
 
+# Smoother used in the cycles
+# 'GS': Gauss-Seidel in lexicographic ordering, one point at a time
+# 'RBGS': Gauss-Seidel in red-black ordering, all points of one colour updated at once
+# 'JAC': damped Jacobi, with the weight that best damps the oscillatory errors at each level
+# 'CHEB': Chebyshev polynomial of Jacobi sweeps, with one sweep for every smoothing iteration
+# Jacobi and Chebyshev smoothers update all points at once, but damp errors a little less than Gauss-Seidel.
+# The Gauss-Seidel coarse solver always uses lexicographic ordering, since red-black ordering
+# diverges on the coarsest levels of strongly stretched grids, where the operator is far from diagonally dominant.
+smType = 'GS'
+
+# Solver used at the coarsest level of V-cycle
+# 'GS': iterate with Gauss-Seidel until tolerance is reached, falling back to 'TDMA' if it does not converge
+# 'TDMA': direct solution of the tridiagonal system using Thomas algorithm
+csType = 'GS'
+
+# Flag to compute residual and restrict it in a single step, without storing the residual of the finer level
+fuseFlag = False
+
+# Flag to compute the initial guess with full multigrid (FMG), i.e., nested iterations
+# starting from the coarsest level, before the V-cycles are computed
+fmgFlag = False
+
+# Number of V-cycles computed at each level during FMG
+fmgCnt = 1
+
+# Flag to record the time spent in each phase of the multigrid cycles at each level
+profFlag = False
+
+# Flag to run the multigrid cycles in single precision (float32), to halve the memory traffic of smoothing.
+# The solution and its residual at the finest level are kept in double precision, and each cycle
+# computes a correction to the solution (iterative refinement), so that the final error is unaffected.
+mixFlag = False
+
+# Method used to solve the system
+# 'MG': stand-alone multigrid cycles
+# 'BiCGStab': stabilized bi-conjugate gradient method, with two multigrid cycles as preconditioner in each iteration.
+#             Conjugate gradient method is not offered, since neither the cycle nor the operator is symmetric.
+#             The rows of the BC are not, and the operator of a non-uniform grid isn't symmetric even in the interior.
+solMode = 'MG'
+
+# Flag to use the kernels compiled with Numba in mgKernels.py, if Numba is installed.
+# They give the same results as the NumPy kernels, but are much faster for lexicographic Gauss-Seidel.
+# They are not used in mixed precision mode, or for batches of RHS with more than one dimension.
+jitFlag = True
+
+# Directory in which the arrays of the finest level are kept as memory-mapped files.
+# If empty, all arrays are kept in memory.
+mmapDir = ''
+
+# Name of file to which the state of the solver is saved every chkInt cycles, so that
+# the solver can be resumed from it with resume(). If chkInt is 0, no checkpoints are written.
+chkFile = 'mgCheck.npz'
+chkInt = 0
+
+# Names of all the parameters listed above, which can be set per instance of multigridSolver
+paramList = ['sInd', 'nPts', 'nuFlag', 'beta', 'galFlag', 'VDepth', 'cycType', 'vcCnt', 'resTol', 'relTol', 'preSm', 'pstSm',
+             'tolerance', 'smType', 'csType', 'fuseFlag', 'fmgFlag', 'fmgCnt',
+             'profFlag', 'mixFlag', 'solMode', 'jitFlag', 'mmapDir', 'chkFile', 'chkInt']
+
+# Allowed values of the parameters that are chosen from a list
+paramChoices = {'cycType': ['V', 'W', 'F'],
+                'smType': ['GS', 'RBGS', 'JAC', 'CHEB'],
+                'csType': ['GS', 'TDMA'],
+                'solMode': ['MG', 'BiCGStab']}
+
+# Grid hierarchies (grid points, metrics and operator coefficients) are cached and shared by all solvers
+# created with the same number of points, VDepth, nuFlag, galFlag, and beta if nuFlag is set.
+# Least recently used hierarchies are dropped once either of the limits below is exceeded.
+# The limits are read every time a hierarchy is added, so they can be changed at any time.
+# Setting cacheSize to 0 disables the cache.
+cacheSize = 8
+
+# Maximum memory, in MB, held by all cached hierarchies together
+cacheMem = 256
+
 ##################################### MAIN ######################################
 
+# Solve the test case with the default parameters set above.
+# The solver is kept in mgRun so that its results can be plotted later.
 def main(oConsole):
-    global N
-    global qtConsole
+    global mgRun
+
+    mgRun = multigridSolver(oConsole)
+    mgRun.run()
+
+
+# Plot the results of the solver run last by main()
+def plotResult(plotType):
+    global mgRun
+
+    mgRun.plotResult(plotType)
+
+
+# A console that writes the output of the solver to a stream, or discards it if the stream is None
+class textConsole:
+    def __init__(self, tStream):
+        self.tStream = tStream
+
+    def updateTEdit(self, cOutString):
+        if self.tStream:
+            print(cOutString, file=self.tStream)
+
+
+# Parser for the command line, with one option for every parameter in paramList.
+# The type of each option is that of its default value set at the top of this file.
+def cliParser():
+    cParser = argparse.ArgumentParser(description="Solve the 1D Poisson equation with the multigrid method. "
+                                      "The parameters are described at the top of mgLite.py.")
+
+    for pName in paramList:
+        pDefault = globals()[pName]
+        pHelp = "default: %(default)s"
+
+        if isinstance(pDefault, bool):
+            cParser.add_argument('--' + pName, action=argparse.BooleanOptionalAction, default=pDefault, help=pHelp)
+        else:
+            cParser.add_argument('--' + pName, type=type(pDefault), default=pDefault, choices=paramChoices.get(pName), help=pHelp)
+
+    cParser.add_argument('--resume', action='store_true', help="continue from the checkpoint in chkFile")
+    cParser.add_argument('--json', metavar='FILE', help="write the results as JSON to FILE, or to standard output if FILE is -")
+    cParser.add_argument('--csv', metavar='FILE', help="write the results as a row of CSV to FILE, or to standard output if FILE is -")
+    cParser.add_argument('--quiet', action='store_true', help="don't print the output of the solver")
+    cParser.add_argument('--plot', nargs='+', default=[], choices=['solution', 'error', 'residual'], help="plot the results")
+    cParser.add_argument('--live', action='store_true', help="plot the residual after every cycle while the solver runs")
+    cParser.add_argument('--verify', action='store_true', help="check that the compiled kernels give the same results as NumPy, instead of solving")
+
+    return cParser
+
+
+# Solve the test case with the parameters given on the command line, and write the results as asked.
+# When the results are written to standard output, the output of the solver goes to standard error.
+# Parameters that the solver rejects, or a grid that doesn't fit in memory, are reported like any other bad argument.
+def cliMain(argList=None):
+    cParser = cliParser()
+    cArgs = cParser.parse_args(argList)
+    mgParams = {x: getattr(cArgs, x) for x in paramList}
+
+    if cArgs.verify:
+        return 0 if verifyBackend() else 1
+
+    if cArgs.quiet:
+        tStream = None
+    elif '-' in [cArgs.json, cArgs.csv]:
+        tStream = sys.stderr
+    else:
+        tStream = sys.stdout
+
+    t0 = time.perf_counter()
+    try:
+        mgRun = multigridSolver(textConsole(tStream), **mgParams)
+    except (ValueError, MemoryError) as runErr:
+        cParser.error(str(runErr))
+    t1 = time.perf_counter()
+
+    if cArgs.live:
+        mgRun.cycleHook = mgRun.plotResidual
+
+    if cArgs.resume:
+        try:
+            mgLHS = mgRun.resume()
+        except (ValueError, OSError) as runErr:
+            cParser.error(str(runErr))
+    else:
+        mgLHS = mgRun.multigrid(np.ones(mgRun.N[0] + 2))
+    t2 = time.perf_counter()
+
+    # The solve failed if it was cancelled, or if a cycle failed, or if not even one cycle was completed
+    runFail = mgRun.stopFlag or mgRun.cycFail or not len(mgRun.rConv)
+
+    mgRes = {'params': mgParams,
+             'gridSize': mgRun.N[0],
+             'failed': bool(runFail),
+             'tolMet': mgRun.tolMet,
+             'errVal': float(mgRun.computeError(mgLHS)),
+             'rConv': mgRun.rConv.tolist(),
+             'cFact': mgRun.cFact.tolist(),
+             'cTime': mgRun.cTime.tolist(),
+             'setupTime': t1 - t0,
+             'solveTime': t2 - t1}
+
+    if cArgs.json:
+        with openOutput(cArgs.json) as oFile:
+            json.dump(mgRes, oFile, indent=4)
+            oFile.write("\n")
+
+    # A single row, with the same columns as the table written by mgSweep.py
+    if cArgs.csv:
+        with openOutput(cArgs.csv, newline='') as oFile:
+            cWriter = csv.writer(oFile)
+            cWriter.writerow(paramList + ['errVal', 'finalRes', 'setupTime', 'solveTime', 'rConv'])
+            cWriter.writerow([mgParams[x] for x in paramList] +
+                             [mgRes['errVal'], mgRes['rConv'][-1] if mgRes['rConv'] else np.nan, mgRes['setupTime'], mgRes['solveTime'],
+                              " ".join("{0:.6e}".format(x) for x in mgRes['rConv'])])
+
+    for plotType, plotName in enumerate(['solution', 'error', 'residual']):
+        if plotName in cArgs.plot:
+            mgRun.plotResult(plotType)
+
+    return 1 if runFail else 0
+
+
+# Open a file to write, where - stands for standard output, which is left open on exit
+def openOutput(fName, **oArgs):
+    if fName == '-':
+        return open(sys.stdout.fileno(), 'w', closefd=False, **oArgs)
+
+    return open(fName, 'w', **oArgs)
+
+
+# Cases in which verifyBackend() checks the compiled kernels
+verifyCases = [{'smType': 'GS'}, {'smType': 'RBGS'}, {'smType': 'JAC'}, {'smType': 'CHEB'},
+               {'smType': 'GS', 'nuFlag': True, 'beta': 1.5}, {'smType': 'RBGS', 'nuFlag': True, 'beta': 1.5},
+               {'smType': 'GS', 'nuFlag': True, 'beta': 1.5, 'galFlag': True}]
+
+# Kernels checked by verifyBackend(), each of which is called at the given level
+verifyKernels = [('imposeBC', 0, lambda x: x.imposeBC(x.pData[0])),
+                 ('smooth', 1, lambda x: x.smooth(2)),
+                 ('laplace', 1, lambda x: x.laplace(x.pData[1], x.lTemp[1])),
+                 ('restrict', 0, lambda x: x.restrict()),
+                 ('restrictResidual', 0, lambda x: x.restrictResidual()),
+                 ('prolong', 1, lambda x: x.prolong()),
+                 ('solve', 5, lambda x: x.solve())]
+
+
+# Returns two solvers for the given case, the first with the NumPy kernels and the second with the compiled kernels
+def backendPair(mgParams):
+    return [multigridSolver(textConsole(None), sInd=8, VDepth=5, vcCnt=4, jitFlag=x, **mgParams) for x in [False, True]]
+
+
+# Calls kFunc at level vLev with both solvers of backendPair() on the same random data.
+# Returns True if the data of both solvers is identical afterwards.
+def sameKernel(mgRuns, vLev, kFunc, zeroBC):
+    rng = np.random.default_rng(0)
+    aList = [rng.standard_normal(x.shape) for x in mgRuns[0].pData + mgRuns[0].rData + mgRuns[0].iTemp]
+
+    for mgRun in mgRuns:
+        for aVal, aNew in zip(mgRun.pData + mgRun.rData + mgRun.iTemp, aList):
+            aVal[...] = aNew
+
+        # The ghost points of iTemp are always 0 in the solver
+        for iTemp in mgRun.iTemp:
+            iTemp[..., [0, -1]] = 0.0
+
+        mgRun.vLev, mgRun.zeroBC = vLev, zeroBC
+        kFunc(mgRun)
+
+    return all(np.array_equal(x, y) for x, y in zip(mgRuns[0].pData + mgRuns[0].rData + mgRuns[0].lTemp,
+                                                    mgRuns[1].pData + mgRuns[1].rData + mgRuns[1].lTemp))
+
+
+# Both solvers of backendPair() solve the test case.
+# Returns True if they give identical solutions and residual histories.
+def sameSolve(mgRuns):
+    mgLHS = [x.multigrid(np.ones(x.N[0] + 2)).copy() for x in mgRuns]
+
+    return np.array_equal(*mgLHS) and np.array_equal(mgRuns[0].rConv, mgRuns[1].rConv)
+
+
+# Check that the kernels compiled with Numba give exactly the same results as the NumPy kernels.
+# For each of verifyCases, two solvers are made, one with each set of kernels, and each of verifyKernels
+# is called by both on the same random data, for a single RHS and a batch of RHS, and with both types of BC.
+# Finally, both solvers solve the test case. Returns True if all the results are identical.
+def verifyBackend(tStream=sys.stdout):
+    oConsole = textConsole(tStream)
+    if not loadKernels():
+        oConsole.updateTEdit("Numba is not installed, and only the NumPy kernels are available")
+        return True
+
+    allSame = True
+    for mgParams in verifyCases:
+        mgRuns = backendPair(mgParams)
+
+        for bShape in [(), (3,)]:
+            for mgRun in mgRuns:
+                mgRun.initVariables(bShape)
+
+            for kName, vLev, kFunc in verifyKernels:
+                for zeroBC in [False, True]:
+                    kSame = sameKernel(mgRuns, vLev, kFunc, zeroBC)
+                    if not kSame:
+                        oConsole.updateTEdit("Results of {0:s} differ for {1:s}, batch shape {2:s}, zeroBC = {3:s}".format(
+                                             kName, str(mgParams), str(bShape), str(zeroBC)))
+
+                    allSame = allSame and kSame
+
+        if not sameSolve(mgRuns):
+            oConsole.updateTEdit("Solutions differ for " + str(mgParams))
+            allSame = False
+
+    if allSame:
+        oConsole.updateTEdit("Compiled kernels give the same results as NumPy kernels in all {0:d} cases".format(len(verifyCases)))
+
+    return allSame
+
+
+################################### PROFILER ####################################
+
+
+# Names of the phases of multigrid cycles, and the methods of multigridSolver that perform them
+phaseList = [('pre-smooth', 'preSmooth'),
+             ('residual', 'calcResidual'),
+             ('restrict', 'restrict'),
+             ('residual+restrict', 'restrictResidual'),
+             ('coarse solve', 'solve'),
+             ('prolong', 'prolong'),
+             ('post-smooth', 'postSmooth')]
+
+
+# Records the wall time and number of calls of each phase of multigrid cycles at each level,
+# along with the number of iterations taken by the iterative solver at the coarsest level.
+# Each phase is recorded against the level at which it starts, so prolong() is listed under the coarser level.
+class mgProfiler:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Dictionaries indexed by (phase name, level)
+        self.pCalls = {}
+        self.pTimes = {}
+
+        # Dictionary of lists of iteration counts of coarse solver, indexed by level
+        self.sIters = {}
+
+    # Replace the methods of mgSolver listed in phaseList with versions that are timed.
+    # Since the original methods are left untouched, there is no cost when profiling is disabled.
+    def attach(self, mgSolver):
+        for pName, fName in phaseList:
+            setattr(mgSolver, fName, self.timedMethod(pName, getattr(mgSolver, fName), mgSolver))
+
+    def timedMethod(self, pName, pFunc, mgSolver):
+        def timedFunc(*args):
+            pKey = (pName, mgSolver.vLev)
+            tStart = time.perf_counter()
+            try:
+                return pFunc(*args)
+            finally:
+                self.pCalls[pKey] = self.pCalls.get(pKey, 0) + 1
+                self.pTimes[pKey] = self.pTimes.get(pKey, 0.0) + time.perf_counter() - tStart
+
+        return timedFunc
+
+    def addIterations(self, vLev, iCount):
+        self.sIters.setdefault(vLev, []).append(iCount)
+
+    # Structured report of the profile, as a list of records sorted by level and phase
+    def report(self):
+        phaseList = []
+        for pKey in sorted(self.pCalls, key=lambda x: (x[1], x[0])):
+            phaseList.append({'phase': pKey[0], 'level': pKey[1],
+                              'calls': self.pCalls[pKey], 'time': self.pTimes[pKey]})
+
+        iterList = [{'level': x, 'iterations': self.sIters[x]} for x in sorted(self.sIters)]
+
+        return {'phases': phaseList, 'coarseIterations': iterList}
+
+    # The same report as above, formatted as a table for the console
+    def reportTable(self):
+        tString = "{0:>5s}  {1:<18s} {2:>8s} {3:>12s}\n".format("Level", "Phase", "Calls", "Time (s)")
+        for pRec in self.report()['phases']:
+            tString += "{0:5d}  {1:<18s} {2:8d} {3:12.4e}\n".format(pRec['level'], pRec['phase'], pRec['calls'], pRec['time'])
+
+        for iRec in self.report()['coarseIterations']:
+            tString += "Iterations of coarse solver at level {0:d}: total {1:d}, maximum {2:d}\n".format(iRec['level'], sum(iRec['iterations']), max(iRec['iterations']))
+
+        return tString
+
+
+################################## GRID CACHE ###################################
+
+
+# A thread-safe LRU cache of grid hierarchies, bounded by both number of entries and memory (in MB).
+# Each hierarchy is a dictionary of arrays (or lists and tuples of arrays) that are read-only,
+# so that they can be shared by many solvers.
+# If a limit is None, the value of cacheSize or cacheMem at the time a hierarchy is added is used.
+class gridCache:
+    def __init__(self, maxCount=None, maxMem=None):
+        self.maxCount = maxCount
+        self.maxMem = maxMem
+
+        # Dictionary of hierarchies, ordered from least to most recently used
+        self.gridDict = {}
+        self.cacheLock = threading.Lock()
+
+        self.hitCount = 0
+        self.missCount = 0
+
+    # Return the hierarchy stored against gKey, or None if it is not cached
+    def get(self, gKey):
+        with self.cacheLock:
+            gData = self.gridDict.pop(gKey, None)
+            if gData is None:
+                self.missCount += 1
+                return None
+
+            self.gridDict[gKey] = gData
+            self.hitCount += 1
+
+            return gData
+
+    # Store a hierarchy, and evict the least recently used ones if the cache grows too large
+    def put(self, gKey, gData):
+        with self.cacheLock:
+            self.gridDict.pop(gKey, None)
+            self.gridDict[gKey] = gData
+
+            maxCount = cacheSize if self.maxCount is None else self.maxCount
+            maxMem = cacheMem if self.maxMem is None else self.maxMem
+            while self.gridDict and (len(self.gridDict) > maxCount or self.memUsage() > maxMem*2**20):
+                del self.gridDict[next(iter(self.gridDict))]
+
+    def clear(self):
+        with self.cacheLock:
+            self.gridDict.clear()
+
+    # Total number of bytes held by the arrays of all cached hierarchies
+    def memUsage(self):
+        bDict = {}
+        for gData in self.gridDict.values():
+            gridArrays(gData, bDict)
+
+        return sum(x.nbytes for x in bDict.values())
+
+
+# Collect the arrays in a (possibly nested) container of arrays into bDict, indexed by id.
+# Views are replaced by their base array, so that memory shared by views is counted only once.
+def gridArrays(gData, bDict):
+    if isinstance(gData, np.ndarray):
+        while isinstance(gData.base, np.ndarray):
+            gData = gData.base
+        bDict[id(gData)] = gData
+
+    elif isinstance(gData, (dict, list, tuple)):
+        for x in (gData.values() if isinstance(gData, dict) else gData):
+            gridArrays(x, bDict)
+
+
+# Memory, in bytes, that can be allocated without swapping, or None if it can't be found on this platform.
+# On Linux, this includes the memory held by caches that the kernel can free.
+def availMemory():
+    try:
+        with open('/proc/meminfo') as mFile:
+            for mLine in mFile:
+                if mLine.startswith('MemAvailable:'):
+                    return 1024*int(mLine.split()[1])
+    except (OSError, ValueError):
+        pass
+
+    try:
+        return os.sysconf('SC_PAGE_SIZE')*os.sysconf('SC_AVPHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+# Grid hierarchies shared by all instances of multigridSolver
+hierCache = gridCache()
+
+
+############################## GRID TRANSFER ###################################
+
+
+# Number of points at each level of V-cycles of depth VDepth on a grid of nFine points.
+# Each level has (n + 1)/2 points of the level above, rounded down, and the coarsest level must have at least 3.
+def levelSizes(nFine, VDepth):
+    nList = [nFine]
+    for i in range(VDepth):
+        nList.append((nList[-1] + 1)//2)
+
+    if nList[-1] < 3:
+        raise ValueError("Grid of {0:d} points is too small for V-cycles of depth {1:d}".format(nFine, VDepth))
+
+    return nList
+
+
+# Points of the tangent-hyperbolic grid of n points with stretching parameter beta, along with
+# the metric terms xi_x, xixx and xix2 of the transformation from the uniform computational grid, xi.
+def tanhGrid(n, beta):
+    tb = np.tanh(beta)
+
+    xi = np.linspace(0.0, 1.0, n)
+    xPts = (1.0 - np.tanh(beta*(1.0 - 2.0*xi))/tb)/2.0
+
+    tx = 1.0 - (tb*(1.0 - 2.0*xPts))**2
+    xi_x = tb/(beta*tx)
+    xixx = -4.0*(tb**3)*(1.0 - 2.0*xPts)/(beta*tx*tx)
+    xix2 = xi_x*xi_x
+
+    return xPts, xi_x, xixx, xix2
+
+
+# Indices and weights for linear interpolation from a grid of nSrc points to one of nDst points,
+# where both grids are uniform in the computational coordinate and span the whole domain.
+# Point i of the destination lies between points lIdx[i] and rIdx[i] of the source, with weights lWgt[i] and rWgt[i].
+def interpWeights(nSrc, nDst):
+    tPos = np.arange(nDst)*((nSrc - 1)/(nDst - 1))
+    lIdx = np.minimum(tPos.astype(int), nSrc - 2)
+    rWgt = tPos - lIdx
+
+    return lIdx, lIdx + 1, 1.0 - rWgt, rWgt
+
 
-    initGlobals()
-    initVariables()
+# Operators to transfer data between a fine grid and a coarse grid whose points don't lie on the fine grid
+def transferOps(nFine, nCoarse):
+    pOps = interpWeights(nCoarse, nFine)
 
-    initGrid()
+    # Index of the first fine point lying in each interval of the coarse grid.
+    # Since the coarse grid is coarser, every interval has at least one fine point.
+    rStart = np.searchsorted(pOps[0], np.arange(nCoarse - 1))
 
-    initDirichlet()
+    return {'prolong': pOps, 'inject': interpWeights(nFine, nCoarse), 'start': rStart}
 
-    qtConsole = oConsole
 
-    mgRHS = np.ones(N[0] + 2)
-    mgLHS = multigrid(mgRHS)
+# Linear interpolation of fSrc into fDst along the last axis, with the indices and weights from interpWeights().
+# If given, wTemp is used as workspace, which must be of the same shape as fDst.
+def interpolate(fSrc, fDst, lIdx, rIdx, lWgt, rWgt, wTemp=None):
+    if wTemp is None:
+        wTemp = np.zeros_like(fDst)
 
-    computeError(mgLHS)
+    np.take(fSrc, rIdx, axis=-1, out=wTemp, mode='clip')
+    wTemp *= rWgt
 
+    np.take(fSrc, lIdx, axis=-1, out=fDst, mode='clip')
+    fDst *= lWgt
+    fDst += wTemp
 
-def initGlobals():
-    global N
-    global VDepth
-    global hx, hx2
-    global maxCount
-    global vLev, zeroBC
 
-    # N should be of the form 2^n + 1
-    # Then there will be 2^n + 3 points in total, including 2 ghost points
-    sLst = [2**x + 1 for x in range(15)]
+# Coefficients of the Galerkin operator, R.A.P, on the coarse grid of nCoarse points nested in the fine grid.
+# aCoef is the 3-point stencil (aW, aC, aE) of A on the fine grid, with the ghost points already eliminated.
+# P is linear interpolation, as in prolong(), and R is full weighting, which is half the transpose of P.
+# The coarse stencil is returned in the same form as aCoef, so that aW[0] and aE[-1] are 0.
+def galerkinCoeffs(aCoef, nCoarse):
+    nFine = len(aCoef[1])
+    lIdx, rIdx, lWgt, rWgt = interpWeights(nCoarse, nFine)
+    pCols = [(lIdx, lWgt), (rIdx, rWgt)]
 
-    # Get array of grid sizes corresponding to each level of V-Cycle
-    N = sLst[sInd:sInd - VDepth - 1:-1]
+    # Bands of the coarse operator, at offsets -2 to 2 from the diagonal.
+    # For nested grids, the outer two bands get only terms with zero weight.
+    cBand = np.zeros((5, nCoarse))
 
-    # Define array of grid spacings
-    hx = [1.0/(x-1) for x in N]
+    # Each coefficient A[i, j] of the fine stencil adds P[i, k]*A[i, j]*P[j, m]/2 to the coarse operator at (k, m)
+    fRow = np.arange(nFine)
+    for jOff, aVal in zip([-1, 0, 1], aCoef):
+        fCol = np.clip(fRow + jOff, 0, nFine - 1)
+        for kIdx, kWgt in pCols:
+            for mIdx, mWgt in pCols:
+                np.add.at(cBand, (mIdx[fCol] - kIdx + 2, kIdx), 0.5*kWgt*aVal*mWgt[fCol])
 
-    # Square of hx, used in finite difference formulae
-    hx2 = [x*x for x in hx]
+    return cBand[1], cBand[2], cBand[3]
 
-    # Maximum number of iterations while solving at coarsest level
-    maxCount = 10*sLst[sInd]
 
-    # Integer specifying the level of V-cycle at any point while solving
-    vLev = 0
+# Eliminate the ghost points from the 3-point stencil (aW, aC, aE), with homogenous BC as in imposeBC().
+# Since P[0] = -P[2] and P[-1] = -P[-3], the coefficient of each ghost point is folded into the neighbouring interior point.
+def elimGhosts(aCoef):
+    aW, aC, aE = (np.copy(x) for x in aCoef)
 
-    # Flag to determine if non-zero homogenous BC has to be applied or not
-    zeroBC = False
+    aE[0] -= aW[0]
+    aW[-1] -= aE[-1]
+    aW[0], aE[-1] = 0.0, 0.0
+
+    return aW, aC, aE
+
+
+# View of aVal as a 2D array with one row for each RHS, as needed by the kernels in mgKernels.py.
+# For a single RHS, this is a single row. Memory-mapped arrays are passed as plain arrays.
+def asRows(aVal):
+    return np.asarray(aVal).reshape(-1, aVal.shape[-1])
+
+
+# Import the kernels compiled with Numba, if that hasn't been tried already. Returns True if they are available.
+def loadKernels():
+    global mgKernels
+    global kernelsTried
+
+    if not kernelsTried:
+        kernelsTried = True
+        try:
+            import mgKernels
+        except ImportError:
+            mgKernels = None
+
+    return mgKernels is not None
+
+
+############################## KRYLOV HELPERS ##################################
+
+
+# Dot product of vectors along the grid, for each RHS
+def vecDot(aVec, bVec):
+    return np.einsum('...i,...i->...', aVec, bVec)
+
+
+# Ratio of num to den, taken as 0 wherever den is 0, as happens for an RHS that has fully converged
+def safeDiv(num, den):
+    num, den = np.asarray(num, dtype=float), np.asarray(den, dtype=float)
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den != 0.0)
+
+
+################################# PLOT HELPERS #################################
+
+
+# Reduce the points of a curve to at most about maxPts, for plotting.
+# The points are split into bins, and only the minimum and maximum of each bin are kept, so that
+# the curve looks the same at screen resolution, with none of its peaks lost.
+def decimate(xVals, yVals, maxPts):
+    nVal = len(yVals)
+    if nVal <= maxPts:
+        return xVals, yVals
+
+    bSize = int(np.ceil(2.0*nVal/maxPts))
+    nBin = nVal//bSize
+
+    yBin = yVals[:nBin*bSize].reshape(nBin, bSize)
+    bOff = np.arange(nBin)*bSize
+
+    # Points left over after the last full bin are kept as they are
+    iKeep = np.unique(np.concatenate((bOff + np.argmin(yBin, axis=1), bOff + np.argmax(yBin, axis=1),
+                                      np.arange(nBin*bSize, nVal), [0])))
+
+    return xVals[iKeep], yVals[iKeep]
 
 
 ############################## MULTI-GRID SOLVER ###############################
 
 
-# The root function of MG-solver, the Atrium, if you will. And H is the RHS
-def multigrid(H):
-    global N
-    global vcCnt
-    global rConv
-    global qtConsole
-    global pData, rData
+# Methods of multigridSolver that smoothen the solution, for each value of smType.
+# Each of them is called with the number of smoothing iterations, at the level given by vLev.
+smootherList = {'GS': 'gsSmooth',
+                'RBGS': 'gsSmooth',
+                'JAC': 'jacobiSmooth',
+                'CHEB': 'chebSmooth'}
+
+# Number of iterations of the Gauss-Seidel coarse solver over which its rate of convergence is measured
+rateCount = 50
+
+
+# The multigrid solver. Every instance owns its parameters, grid hierarchy and
+# workspace arrays, so that many solvers can co-exist and run in separate threads.
+# oConsole is the console window of GUI, or False to print to standard output.
+class multigridSolver:
+    # Number of dimensions of the grid. The arrays of the solver have one axis for each of them,
+    # after the axes of a batch of RHS. The solvers in mgLiteND.py set this to 2 or 3.
+    nDim = 1
+
+    def __init__(self, oConsole=False, **mgParams):
+        # Parameters that are not specified take the default values set at the top of this file
+        for pName in paramList:
+            setattr(self, pName, mgParams.pop(pName, globals()[pName]))
+
+        if mgParams:
+            raise TypeError("Unknown multigrid parameter(s): " + ", ".join(mgParams))
+
+        self.qtConsole = oConsole
+
+        # The hierarchy of grids is decided by initGlobals(), and its memory usage is reported before allocating it
+        self.initGlobals()
+        self.writeOut("Grid of {0} points with {1:d} levels needs about {2:.2f} MB of memory\n".format("x".join([str(self.N[0])]*self.nDim), len(self.N), self.memEstimate()/2**20))
+
+        # Function called after every cycle with the cycle number and residual, if set
+        self.cycleHook = None
+
+        # Flag set by cancel() to stop the solver at the end of current cycle
+        self.stopFlag = False
+
+        # Record of time spent in each phase of the cycles.
+        # When profiling is enabled, the methods that make up each phase are replaced by timed versions.
+        self.mgProf = mgProfiler()
+        if self.profFlag:
+            self.mgProf.attach(self)
+
+        self.initVariables()
+
+        self.initGrid()
+
+        self.initDirichlet()
+
+
+    # Solve the test case, whose RHS is 1 everywhere, and report the error
+    def run(self):
+        mgRHS = np.ones((self.N[0] + 2,)*self.nDim)
+        mgLHS = self.multigrid(mgRHS)
+
+        self.computeError(mgLHS)
+
+
+    def initGlobals(self):
+        # N should ideally be of the form 2^n + 1
+        # Then there will be 2^n + 3 points in total, including 2 ghost points
+        nFine = self.nPts if self.nPts else 2**self.sInd + 1
+
+        # Get array of grid sizes corresponding to each level of V-Cycle
+        self.N = levelSizes(nFine, self.VDepth)
+
+        # Define array of grid spacings
+        self.hx = [1.0/(x-1) for x in self.N]
+
+        # Square of hx, used in finite difference formulae
+        self.hx2 = [x*x for x in self.hx]
+
+        # Maximum number of iterations while solving at coarsest level.
+        # Gauss-Seidel needs O(n^2) iterations to converge on a grid of n points, which takes far too long on the
+        # large coarsest levels of shallow hierarchies. So the limit grows only linearly, and beyond it the level is solved directly.
+        self.maxCount = max(1000, 10*self.N[-1])
+
+        # Flag set once Gauss-Seidel fails to converge at the coarsest level, which is solved directly thereafter
+        self.csDirect = False
+
+        # Axes of the grid in all arrays, which come after the axes of a batch of RHS,
+        # and the index of the interior points of an array with ghost points
+        self.gridAxes = tuple(range(-self.nDim, 0))
+        self.inner = (Ellipsis,) + (slice(1, -1),)*self.nDim
+
+        # Integer specifying the level of V-cycle at any point while solving
+        self.vLev = 0
+
+        # Flag to determine if non-zero homogenous BC has to be applied or not
+        self.zeroBC = False
+
+        # Flag to apply homogenous BC at the starting level of cycles too, when they compute a correction
+        self.zeroTop = False
+
+        # Flag to keep the solution and RHS at the finest level apart from the arrays used by the cycles.
+        # This is needed when the cycles only compute corrections to the solution.
+        self.sepSoln = self.mixFlag or self.solMode != 'MG'
+
+
+    # Estimate of the memory, in bytes, taken by the grid hierarchy and the arrays of the solver for bSize RHS.
+    # This is computed from the grid sizes alone, so that it can be checked before anything is allocated.
+    def memEstimate(self, bSize=1):
+        nSum = sum(self.N)
+        nLev = len(self.N)
 
-    n = N[0]
-    rData[0] = H[1:-1]
-    chMat = np.zeros(n)
-    rConv = np.zeros(vcCnt)
+        # rData, lTemp and wTemp, along with pData, sData and iTemp, which include ghost points, and cData of Chebyshev smoother.
+        # Arrays of the finest level take no memory if they are mapped to files.
+        iSize = 4 if self.mixFlag else 8
+        memVal = bSize*iSize*(6*nSum + 6*nLev)
+        if self.smType == 'CHEB':
+            memVal += bSize*iSize*nSum
+        if self.mmapDir:
+            memVal -= bSize*iSize*(6*self.N[0] + 6)
+            if self.smType == 'CHEB':
+                memVal -= bSize*iSize*self.N[0]
 
-    for i in range(vcCnt):
-        cycleFail = v_cycle()
-        if cycleFail:
-            break
+        # Grid points, two metric terms, stencil coefficients, Gauss-Seidel coefficients and Jacobi coefficients
+        memVal += 8*10*nSum
+        if self.mixFlag:
+            mixCopy = self.mixCoefs()
+            memVal += 4*(3*mixCopy['lapCoef'] + 3*mixCopy['gsCoef'] + mixCopy['jacCoef'])*nSum
 
-        chMat = laplace(pData[0])
-        resVal = np.amax(np.abs(H[1:n+1] - chMat))
-        rConv[i] = resVal
+        # Indices and weights of interpolation between levels that are not nested
+        for nFine, nCoarse in zip(self.N[:-1], self.N[1:]):
+            if nFine != 2*nCoarse - 1:
+                memVal += 8*(4*nFine + 5*nCoarse)
 
-        if qtConsole:
-            qtConsole.updateTEdit("Residual after V-Cycle {0:2d} is {1:.4e}\n".format(i+1, resVal))
+        # Solution and RHS kept apart from the cycles, and vectors of Krylov solvers
+        if not self.mmapDir:
+            if self.sepSoln:
+                memVal += bSize*8*2*self.N[0]
+            if self.solMode != 'MG':
+                memVal += bSize*8*8*self.N[0]
+
+        return memVal
+
+
+    # Ask the solver to stop. This may be called from another thread while the solver is running.
+    def cancel(self):
+        self.stopFlag = True
+
+
+    # Send the output string to the console window of GUI if available, else print it
+    def writeOut(self, outString):
+        if self.qtConsole:
+            self.qtConsole.updateTEdit(outString)
         else:
-            print("Residual after V-Cycle {0:2d} is {1:.4e}\n".format(i+1, resVal))
+            print(outString)
 
-    return pData[0]
 
+    # Returns the time spent in each phase of the cycles during last call to multigrid()
+    def profReport(self):
+        return self.mgProf.report()
 
-# Multigrid V-cycle without the use of recursion
-def v_cycle():
-    global VDepth
-    global vLev, zeroBC
-    global pstSm, preSm
 
-    vLev = 0
-    zeroBC = False
+    # The root function of MG-solver, the Atrium, if you will. And H is the RHS
+    # H can also be a 2D array of shape (batch, N + 2), with one RHS in each row.
+    # In that case, all the RHS are solved together and rConv holds one column of residuals per RHS.
+    def multigrid(self, H):
+        tStart = time.perf_counter()
 
-    # Pre-smoothing
-    smooth(preSm)
+        # Residual of the initial guess, which sets the relative tolerance
+        res0 = self.startSolve(H)
+        resTol = np.maximum(self.resTol, self.relTol*res0)
 
-    zeroBC = True
-    for i in range(VDepth):
-        # Compute residual
-        calcResidual()
+        prvRes = res0
+        if self.fmgFlag:
+            if self.fmg_cycle():
+                self.rConv, self.cFact = self.rConv[:0], self.cFact[:0]
+                self.cycFail, self.tolMet = True, False
+                return self.pSoln
 
-        # Copy smoothed pressure for later use
-        sData[vLev] = np.copy(pData[vLev])
+            # The BC is imposed again in double precision, as the ghost points may have been rounded to single precision
+            if self.sepSoln:
+                self.pSoln[...] = self.pData[0]
+                self.imposeBC(self.pSoln)
 
-        # Restrict to coarser level - down we go!
-        restrict()
+            prvRes = self.maxResidual()
+            self.writeOut("Residual after full multigrid is {0:.4e}\n".format(np.amax(prvRes)))
+            self.computeError(self.pSoln)
+            self.writeOut("\n")
 
-        # Reinitialize pressure at coarser level to 0 - this is critical!
-        pData[vLev].fill(0.0)
+        if self.solMode != 'MG':
+            self.krylovStart()
+
+        return self.iterate(0, resTol, prvRes, tStart)
+
+
+    # Solve for a new RHS, H, starting from the initial guess p0, or from the last solution if p0 is None.
+    # This keeps the grid hierarchy and all the arrays, and is meant for a sequence of RHS that change
+    # slowly, as in time-stepping, where a cycle or two is enough to correct the previous solution.
+    # Since the guess is close to the solution, relTol is taken relative to the largest value of the RHS.
+    # If neither resTol nor relTol is set, the cycles stop once the residual reached by the previous solve is reached.
+    def resolve(self, H, p0=None):
+        tStart = time.perf_counter()
+
+        bShape = H.shape[:H.ndim - self.nDim]
+        lastRes = self.rConv[-1] if len(self.rConv) and bShape == self.bShape else None
+
+        if p0 is not None:
+            # The arrays are reallocated for the new shape before the guess is copied in
+            if bShape != self.bShape:
+                self.initVariables(bShape)
+
+            self.pSoln[...] = p0
+
+        res0 = self.startSolve(H)
+        if self.resTol or self.relTol:
+            resTol = np.maximum(self.resTol, self.relTol*np.amax(np.abs(self.rSoln), axis=self.gridAxes))
+        elif lastRes is not None:
+            # The previous solve may have gone down to round-off error, which need not be reached again for a new RHS
+            rndOff = 16.0*np.finfo(np.float64).eps*np.amax(np.abs(self.refCoef[1]))*np.amax(np.abs(self.pSoln), axis=self.gridAxes)
+            resTol = np.maximum(lastRes, rndOff)
+        else:
+            resTol = 0.0
+
+        self.writeOut("Residual of initial guess is {0:.4e}\n".format(np.amax(res0)))
+        if np.all(res0 <= resTol):
+            self.writeOut("Initial guess is within tolerance\n")
+            self.rConv, self.cFact, self.cTime = self.rConv[:0], self.cFact[:0], self.cTime[:0]
+            self.tolMet = True
+            return self.pSoln
+
+        if self.solMode != 'MG':
+            self.krylovStart()
+
+        return self.iterate(0, resTol, res0, tStart)
+
+
+    # Set H as the RHS, and start fresh records of the cycles.
+    # The present solution is the initial guess, and its residual is returned.
+    def startSolve(self, H):
+        # Reallocate the arrays if the number of RHS has changed
+        bShape = H.shape[:H.ndim - self.nDim]
+        if bShape != self.bShape:
+            self.initVariables(bShape)
+
+        # In mixed precision, rData[0] is set from the residual before each cycle
+        self.rSoln[...] = H[self.inner]
+        self.rData[0][...] = H[self.inner]
+        self.rConv = np.zeros((self.vcCnt,) + bShape)
+
+        # Ratio of residuals of successive V-cycles
+        self.cFact = np.zeros((self.vcCnt,) + bShape)
+
+        # Time elapsed since the start of solver at the end of each V-cycle
+        self.cTime = np.zeros(self.vcCnt)
+
+        # Start a fresh record of the time spent in each phase of the cycles
+        self.mgProf.reset()
+
+        # Set at the end of the solve, to tell if a cycle failed, and if the residual reached the tolerance
+        self.cycFail, self.tolMet = False, None
+
+        self.zeroBC = False
+        self.imposeBC(self.pSoln)
+
+        return self.maxResidual()
+
+
+    # Continue the solution from the state saved in the checkpoint file, chkName.
+    # The cycles that were completed before the checkpoint was written are not computed again.
+    def resume(self, chkName=None):
+        chkName = chkName or self.chkFile
+
+        with np.load(chkName) as chkData:
+            pSoln = chkData['pSoln']
+            bShape = pSoln.shape[:pSoln.ndim - self.nDim]
+            if pSoln.shape[len(bShape):] != (self.N[0] + 2,)*self.nDim:
+                raise ValueError("Checkpoint {0} is of a grid of {1} points, and not {2:d}".format(chkName, pSoln.shape[-1] - 2, self.N[0]))
+
+            if str(chkData['solMode']) != self.solMode:
+                raise ValueError("Checkpoint {0} was written with solMode = {1}".format(chkName, chkData['solMode']))
+
+            if bShape != self.bShape:
+                self.initVariables(bShape)
+
+            self.pSoln[...] = pSoln
+            self.rSoln[...] = chkData['rSoln']
+            self.rData[0][...] = self.rSoln
+
+            # History of residuals and time of the cycles already computed
+            vcDone = int(chkData['vcDone'])
+            cCount = max(vcDone, self.vcCnt)
+            self.rConv = np.zeros((cCount,) + bShape)
+            self.cFact = np.zeros((cCount,) + bShape)
+            self.cTime = np.zeros(cCount)
+
+            self.rConv[:vcDone] = chkData['rConv']
+            self.cFact[:vcDone] = chkData['cFact']
+            self.cTime[:vcDone] = chkData['cTime']
+
+            resTol = chkData['resTol']
+
+            # State of the Krylov solver
+            if self.solMode != 'MG':
+                for i, kVec in enumerate(self.kData):
+                    kVec[...] = chkData['kData' + str(i)]
+
+                for kName in ['kRho', 'kAlpha', 'kOmega']:
+                    if kName in chkData:
+                        setattr(self, kName, chkData[kName])
+
+        self.writeOut("Resuming from {0} after {1:d} cycles\n".format(chkName, vcDone))
+
+        self.mgProf.reset()
+
+        self.zeroBC = False
+        self.imposeBC(self.pSoln)
+        prvRes = self.maxResidual()
+
+        # The time of cycles continues from where it stopped
+        tStart = time.perf_counter() - (self.cTime[vcDone-1] if vcDone else 0.0)
+
+        return self.iterate(vcDone, resTol, prvRes, tStart)
+
+
+    # Save the state of the solver after vcDone cycles to the checkpoint file.
+    # Only the arrays of the finest level are needed, as every cycle starts afresh at the coarser levels.
+    # The file is first written under a temporary name, so that a crash while writing it doesn't spoil the last checkpoint.
+    def saveCheckpoint(self, vcDone, resTol):
+        chkData = {'pSoln': self.pSoln, 'rSoln': self.rSoln, 'vcDone': vcDone, 'resTol': resTol, 'solMode': self.solMode,
+                   'rConv': self.rConv[:vcDone], 'cFact': self.cFact[:vcDone], 'cTime': self.cTime[:vcDone]}
+
+        if self.solMode != 'MG':
+            for i, kVec in enumerate(self.kData):
+                chkData['kData' + str(i)] = kVec
+
+            for kName in ['kRho', 'kAlpha', 'kOmega']:
+                if hasattr(self, kName):
+                    chkData[kName] = getattr(self, kName)
+
+        tmpName = self.chkFile + '.tmp'
+        with open(tmpName, 'wb') as cFile:
+            np.savez(cFile, **chkData)
+
+        os.replace(tmpName, self.chkFile)
 
-        # If the coarsest level is reached, solve. Otherwise, keep smoothing!
-        if vLev == VDepth:
-            solveFail = solve()
-            if solveFail:
+
+    # Compute the cycles, or Krylov iterations, from cycle number vcDone onwards, till the residual falls to resTol.
+    # prvRes is the residual of the present solution, and tStart is the time at which the solver started.
+    def iterate(self, vcDone, resTol, prvRes, tStart):
+        if self.solMode == 'MG':
+            cName = self.cycType + "-Cycle"
+        else:
+            cName = self.solMode + " iteration"
+
+        cycleFail = 0
+        for i in range(vcDone, self.vcCnt):
+            if self.stopFlag:
+                break
+
+            if self.solMode == 'BiCGStab':
+                cycleFail = self.bicgstab_step()
+            elif self.mixFlag:
+                cycleFail = self.refine_cycle()
+            else:
+                cycleFail = self.mg_cycle()
+
+            if cycleFail:
+                break
+
+            resVal = self.maxResidual()
+            self.rConv[i] = resVal
+            self.cFact[i] = resVal/np.where(prvRes > 0.0, prvRes, 1.0)
+            prvRes = resVal
+            vcDone = i + 1
+
+            self.cTime[i] = time.perf_counter() - tStart
+
+            # For multiple RHS, only the worst residual is reported
+            self.writeOut("Residual after {0} {1:2d} is {2:.4e}, convergence factor is {3:.4f}\n".format(cName, i+1, np.amax(resVal), np.amax(self.cFact[i])))
+
+            if self.cycleHook:
+                self.cycleHook(i+1, resVal)
+
+            if self.chkInt and vcDone % self.chkInt == 0:
+                self.saveCheckpoint(vcDone, resTol)
+
+            # Stop once the residuals of all RHS are within tolerance
+            if np.all(resVal <= resTol):
+                self.writeOut("Residual is within tolerance after {0:d} {1}s\n".format(i+1, cName))
+                break
+
+        if self.stopFlag:
+            self.writeOut("Solver cancelled after {0:d} {1}s\n".format(vcDone, cName))
+
+        # Keep only the residuals of the V-cycles that were computed
+        self.rConv = self.rConv[:vcDone]
+        self.cFact = self.cFact[:vcDone]
+        self.cTime = self.cTime[:vcDone]
+
+        # tolMet is left as None if neither resTol nor relTol was set, as there is no tolerance to meet then
+        self.cycFail = bool(cycleFail)
+        self.tolMet = bool(vcDone and np.all(self.rConv[-1] <= resTol)) if np.any(resTol > 0.0) else None
+
+        if vcDone:
+            self.writeOut("Time taken by {0:d} {1}s is {2:.4e} s\n".format(vcDone, cName, self.cTime[-1]))
+
+        if self.profFlag:
+            self.writeOut(self.mgProf.reportTable())
+
+        return self.pSoln
+
+
+    # Maximum absolute value of the residual at the finest level, for each RHS
+    def maxResidual(self):
+        self.vLev = 0
+
+        # If the solution is kept apart, the residual is computed in double precision and kept in rTemp for refine_cycle()
+        if self.sepSoln:
+            self.fineLaplace(self.pSoln, self.rTemp)
+            np.subtract(self.rSoln, self.rTemp, out=self.rTemp)
+            np.abs(self.rTemp, out=self.aTemp)
+
+            return np.amax(self.aTemp, axis=self.gridAxes)
+
+        chMat = self.laplace(self.pData[0], self.lTemp[0])
+        np.subtract(self.rData[0], chMat, out=chMat)
+        np.abs(chMat, out=chMat)
+
+        return np.amax(chMat, axis=self.gridAxes)
+
+
+    # Full multigrid cycle. The problem is solved at the coarsest level first, and
+    # its solution is prolonged to the next finer level to serve as initial guess for
+    # fmgCnt V-cycles at that level. This is repeated till the finest level is reached.
+    def fmg_cycle(self):
+        # Transfer the RHS to all levels by injection, or by interpolation for levels that are not nested
+        for i in range(self.VDepth):
+            if self.xfer[i] is None:
+                self.rData[i+1][...] = self.rData[i][(Ellipsis,) + (slice(None, None, 2),)*self.nDim]
+            else:
+                interpolate(self.rData[i], self.rData[i+1], *self.xfer[i]['inject'])
+
+        # Solve at coarsest level, with the actual BC.
+        # Galerkin operators have the ghost points eliminated with homogenous BC, so the coarser levels solve
+        # instead for the difference of the solution from pWall, which has the same RHS, since the operator
+        # gives 0 for a constant. pWall is added back at the finest level.
+        self.vLev = self.VDepth
+        self.zeroBC = self.galFlag
+        self.zeroTop = self.galFlag
+        self.pData[self.vLev].fill(0.0)
+
+        solveFail = self.solve()
+        if solveFail:
+            self.zeroTop = False
+            return 1
+
+        for i in range(self.VDepth):
+            # Prolong solution to next finer level as initial guess - up we go!
+            self.prolong()
+            sLev = self.vLev
+
+            if self.galFlag and sLev == 0:
+                self.pData[0] += self.pWall
+                self.zeroTop = False
+
+            for j in range(self.fmgCnt):
+                cycleFail = self.mg_cycle(sLev)
+                if cycleFail:
+                    self.zeroTop = False
+                    return 1
+
+            self.vLev = sLev
+
+        return 0
+
+
+    # Iterative refinement step of mixed precision mode.
+    # A single precision cycle solves for the correction to the solution, with the residual
+    # left in rTemp by maxResidual() as RHS.
+    # The correction is then added to the double precision solution.
+    def refine_cycle(self):
+        if self.mg_correct(self.rTemp):
+            return 1
+
+        self.pSoln += self.pData[0]
+
+        self.zeroBC = False
+        self.imposeBC(self.pSoln)
+
+        return 0
+
+
+    # Computes one multigrid cycle with rVec as RHS, starting from zero and with homogenous BC at all levels.
+    # The result, left in pData[0], is an approximation to the correction for a solution whose residual is rVec.
+    def mg_correct(self, rVec):
+        np.copyto(self.rData[0], rVec)
+        self.pData[0].fill(0.0)
+
+        self.zeroTop = True
+        cycleFail = self.mg_cycle()
+        self.zeroTop = False
+
+        return cycleFail
+
+
+    # The preconditioner of Krylov solvers. The correction computed by mg_correct() is written to zVec.
+    def precondition(self, rVec, zVec):
+        if self.mg_correct(rVec):
+            return 1
+
+        np.copyto(zVec, self.pData[0][..., 1:-1])
+
+        return 0
+
+
+    # Applies the operator of the finest level, with homogenous BC, to the interior values in pVec
+    def applyOperator(self, pVec, qVec):
+        self.kGhost[..., 1:-1] = pVec
+
+        self.zeroBC = True
+        self.imposeBC(self.kGhost)
+        self.zeroBC = False
+
+        self.fineLaplace(self.kGhost, qVec)
+
+
+    # Initialize the Krylov solver from the residual of the present solution
+    def krylovStart(self):
+        rVec, pVec, vVec, rHat = self.kData[:4]
+        np.copyto(rVec, self.rTemp)
+        np.copyto(rHat, rVec)
+        pVec.fill(0.0)
+        vVec.fill(0.0)
+
+        self.kRho = np.ones(self.bShape)
+        self.kAlpha = np.ones(self.bShape)
+        self.kOmega = np.ones(self.bShape)
+
+
+    # One iteration of right-preconditioned BiCGStab method, which uses two multigrid cycles
+    def bicgstab_step(self):
+        rVec, pVec, vVec, rHat, yVec, tVec, wVec = self.kData
+
+        rhoNew = vecDot(rHat, rVec)
+        beta = safeDiv(rhoNew, self.kRho)*safeDiv(self.kAlpha, self.kOmega)
+
+        # New search direction, p = r + beta*(p - omega*v)
+        np.multiply(self.kOmega[..., None], vVec, out=wVec)
+        pVec -= wVec
+        pVec *= beta[..., None]
+        pVec += rVec
+
+        if self.precondition(pVec, yVec):
+            return 1
+
+        self.applyOperator(yVec, vVec)
+        self.kAlpha = safeDiv(rhoNew, vecDot(rHat, vVec))
+
+        # Half step, after which rVec holds the intermediate residual s = r - alpha*v
+        np.multiply(self.kAlpha[..., None], yVec, out=wVec)
+        self.pSoln[..., 1:-1] += wVec
+        np.multiply(self.kAlpha[..., None], vVec, out=wVec)
+        rVec -= wVec
+
+        if self.precondition(rVec, yVec):
+            return 1
+
+        self.applyOperator(yVec, tVec)
+        self.kOmega = safeDiv(vecDot(tVec, rVec), vecDot(tVec, tVec))
+
+        # Full step
+        np.multiply(self.kOmega[..., None], yVec, out=wVec)
+        self.pSoln[..., 1:-1] += wVec
+        np.multiply(self.kOmega[..., None], tVec, out=wVec)
+        rVec -= wVec
+
+        self.zeroBC = False
+        self.imposeBC(self.pSoln)
+        self.kRho = rhoNew
+
+        return 0
+
+
+    # Computes one multigrid cycle of the type chosen by cycType, starting from level sLev
+    def mg_cycle(self, sLev=0):
+        if self.cycType == 'V':
+            return self.v_cycle(sLev)
+
+        self.vLev = sLev
+        return self.r_cycle(self.cycType, sLev)
+
+
+    # Multigrid cycle with the use of recursion, for W and F-cycles.
+    # It smoothens at the current level, and restricts the residual to the next coarser level.
+    # There, it computes two W-cycles for a W-cycle, and an F-cycle followed by a V-cycle for an F-cycle,
+    # before prolonging the correction and post-smoothing. sLev is the level at which the cycle began.
+    def r_cycle(self, cType, sLev):
+        cLev = self.vLev
+
+        # Apply homogenous BC so long as we are not at the starting level of cycle
+        self.zeroBC = cLev > sLev or self.zeroTop
+
+        # If the coarsest level is reached, solve
+        if cLev == self.VDepth:
+            return self.solve()
+
+        # Pre-smoothing
+        self.preSmooth()
+
+        # Compute residual and restrict it - down we go!
+        self.descend()
+
+        if cType == 'W':
+            subCycles = ['W', 'W']
+        elif cType == 'F':
+            subCycles = ['F', 'V']
+        else:
+            subCycles = ['V']
+
+        # Each cycle at coarser level continues from the pressure left by the previous one
+        for subType in subCycles:
+            self.vLev = cLev + 1
+            cycleFail = self.r_cycle(subType, sLev)
+            if cycleFail:
                 return 1
+
+        # Prolong pressure to this level and correct it - up we go!
+        self.vLev = cLev + 1
+        self.ascend()
+
+        # Post-smoothing
+        self.zeroBC = cLev > sLev or self.zeroTop
+        self.postSmooth()
+
+        return 0
+
+
+    # Multigrid V-cycle without the use of recursion
+    # The V-cycle starts from level sLev, which is the finest level unless called by fmg_cycle()
+    def v_cycle(self, sLev=0):
+        self.vLev = sLev
+        self.zeroBC = self.zeroTop
+
+        # Pre-smoothing
+        self.preSmooth()
+
+        self.zeroBC = True
+        for i in range(self.VDepth - sLev):
+            # Compute residual and restrict it - down we go!
+            self.descend()
+
+            # If the coarsest level is reached, solve. Otherwise, keep smoothing!
+            if self.vLev == self.VDepth:
+                solveFail = self.solve()
+                if solveFail:
+                    return 1
+            else:
+                self.preSmooth()
+
+        # Prolongation operations
+        for i in range(self.VDepth - sLev):
+            # Prolong pressure to next finer level and correct it - up we go!
+            self.ascend()
+
+            # Apply homogenous BC so long as we are not at the starting level of V-cycle
+            if self.vLev > sLev:
+                self.zeroBC = True
+            else:
+                self.zeroBC = self.zeroTop
+
+            # Post-smoothing
+            self.postSmooth()
+
+        return 0
+
+
+    # Computes the residual at current level and restricts it to the next coarser level
+    def descend(self):
+        # Copy smoothed pressure for later use
+        np.copyto(self.sData[self.vLev], self.pData[self.vLev])
+
+        if self.fuseFlag:
+            # Compute residual and restrict it to coarser level in one go
+            self.restrictResidual()
         else:
-            smooth(preSm)
+            # Compute residual
+            self.calcResidual()
 
-    # Prolongation operations
-    for i in range(VDepth):
-        # Prolong pressure to next finer level - up we go!
-        prolong()
+            # Restrict to coarser level
+            self.restrict()
+
+        # Reinitialize pressure at coarser level to 0 - this is critical!
+        self.pData[self.vLev].fill(0.0)
+
+
+    # Prolongs the correction from current level to the next finer level, and adds it there
+    def ascend(self):
+        # Prolong pressure to next finer level
+        self.prolong()
 
         # Add previously stored smoothed data
-        pData[vLev] += sData[vLev]
+        self.pData[self.vLev] += self.sData[self.vLev]
+
+
+    # Smoothing at the start and end of each level of the cycle.
+    # These are separate methods so that the profiler can time them separately.
+    def preSmooth(self):
+        self.smooth(self.preSm)
+
+    def postSmooth(self):
+        self.smooth(self.pstSm)
+
+
+    # Smoothens the solution sCount times using the smoother chosen by smType
+    def smooth(self, sCount):
+        getattr(self, smootherList[self.smType])(sCount)
+
+
+    # Smoothens the solution sCount times using Gauss-Seidel smoother
+    def gsSmooth(self, sCount):
+        for i in range(sCount):
+            self.imposeBC(self.pData[self.vLev])
+
+            # Gauss-Seidel smoothing
+            self.gsSweep(self.smType == 'RBGS')
+
+        self.imposeBC(self.pData[self.vLev])
+
+
+    # Smoothens the solution sCount times using damped Jacobi smoother.
+    # The weight of each point is set by makeGrid() and is kept in jacCoef, along with the inverse of the diagonal.
+    def jacobiSmooth(self, sCount):
+        pLev = self.pData[self.vLev][self.inner]
+
+        for i in range(sCount):
+            pLev += self.jacobiCorrection(1.0)
+
+        self.imposeBC(self.pData[self.vLev])
+
+
+    # Smoothens the solution using a Chebyshev polynomial of degree sCount in the damped Jacobi iteration.
+    # The eigenvalues of the damped Jacobi iteration matrix are at most 4/3, and the polynomial is smallest over
+    # the upper half of the spectrum, [2/3, 4/3], which holds the errors that the coarser levels cannot correct.
+    # In more dimensions, these errors span more of the spectrum, [2/(2*nDim + 1), 4*nDim/(2*nDim + 1)], whose centre is still 1.
+    # For sCount = 1, this is the same as the Jacobi smoother.
+    # Each sweep adds a direction, kept in cData, which is a combination of the previous direction
+    # and the Jacobi correction, with the weights of the three term recurrence of Chebyshev polynomials.
+    def chebSmooth(self, sCount):
+        pLev = self.pData[self.vLev][self.inner]
+        dVec = self.cData[self.vLev]
+
+        # Centre and half-width of the interval of eigenvalues, which is [2/3, 4/3] in 1D
+        eMid, eRad = 1.0, (2*self.nDim - 1)/(2*self.nDim + 1)
+
+        np.copyto(dVec, self.jacobiCorrection(1.0/eMid))
+        pLev += dVec
+
+        rhoOld = eRad/eMid
+        for i in range(1, sCount):
+            rhoNew = 1.0/(2.0*eMid/eRad - rhoOld)
+
+            dVec *= rhoNew*rhoOld
+            dVec += self.jacobiCorrection(2.0*rhoNew/eRad)
+            pLev += dVec
+
+            rhoOld = rhoNew
+
+        self.imposeBC(self.pData[self.vLev])
+
+
+    # Computes the correction of a damped Jacobi sweep scaled by jScale, jScale*jacCoef*(R - A.P), at the current level.
+    # The BC is imposed on P first, and the correction is returned in lTemp.
+    def jacobiCorrection(self, jScale):
+        vLev = self.vLev
+        self.imposeBC(self.pData[vLev])
 
-        # Apply homogenous BC so long as we are not at finest mesh (at which vLev = 0)
-        if vLev:
-            zeroBC = True
+        jVec = self.laplace(self.pData[vLev], self.lTemp[vLev])
+        np.subtract(self.rData[vLev], jVec, out=jVec)
+        jVec *= self.jacCoef[vLev]
+        if jScale != 1.0:
+            jVec *= jScale
+
+        return jVec
+
+
+    # Performs a single Gauss-Seidel sweep at the current level of V-cycle,
+    # in red-black ordering if rbFlag is set, and in lexicographic ordering otherwise
+    def gsSweep(self, rbFlag):
+        vLev = self.vLev
+        n = self.N[vLev]
+        hx, hx2 = self.hx[vLev], self.hx2[vLev]
+        xixx, xix2 = self.xixx[vLev], self.xix2[vLev]
+        pLev, rLev = self.pData[vLev], self.rData[vLev]
+
+        if self.useJit:
+            pRows, rRows = asRows(pLev), asRows(rLev)
+            if rbFlag:
+                mgKernels.rbgsSweep(pRows, rRows, *self.gsCoef[vLev])
+            elif self.galFlag:
+                mgKernels.gsSweepCoef(pRows, rRows, *self.gsCoef[vLev])
+            elif self.nuFlag:
+                mgKernels.gsSweepStretched(pRows, rRows, xixx, xix2, hx, hx2)
+            else:
+                mgKernels.gsSweepUniform(pRows, rRows, hx2)
+
+        elif rbFlag:
+            # Red-black ordering - odd indices (red) are updated first, then even indices (black)
+            # Each colour depends only on points of the other colour, so it is updated as a single slice.
+            # The update is P = cW*P_west + cE*P_east + cR*R, computed in place with the help of wTemp.
+            cW, cE, cR = self.gsCoef[vLev]
+            for c in [1, 2]:
+                pCol = pLev[..., c:n+1:2]
+                wTemp = self.wTemp[vLev][..., :pCol.shape[-1]]
+
+                np.multiply(cW[c-1::2], pLev[..., c-1:n:2], out=pCol)
+                np.multiply(cE[c-1::2], pLev[..., c+1::2], out=wTemp)
+                pCol += wTemp
+                np.multiply(cR[c-1::2], rLev[..., c-1::2], out=wTemp)
+                pCol += wTemp
         else:
-            zeroBC = False
+            # Lexicographic ordering
+            # The transposed views put the grid index first, so that pLev[j] is a plain scalar
+            # for a single RHS, and a view of all RHS at point j for a batch.
+            pLev, rLev = pLev.T, rLev.T
+            if self.galFlag:
+                # For Galerkin operators, whose stencil is known only through its coefficients
+                cW, cE, cR = self.gsCoef[vLev]
+                for j in range(1, n+1):
+                    pLev[j] = cW[j-1]*pLev[j-1] + cE[j-1]*pLev[j+1] + cR[j-1]*rLev[j-1]
+            elif self.nuFlag:
+                # For non-uniform grid
+                for j in range(1, n+1):
+                    pLev[j] = (xix2[j-1]*(pLev[j+1] + pLev[j-1])*2.0 +
+                               xixx[j-1]*(pLev[j+1] - pLev[j-1])*hx -
+                               rLev[j-1]*2.0*hx2) / (4.0*xix2[j-1])
+            else:
+                # For uniform grid
+                for j in range(1, n+1):
+                    pLev[j] = (pLev[j+1] + pLev[j-1] - hx2*rLev[j-1])*0.5
 
-        # Post-smoothing
-        smooth(pstSm)
 
-    return 0
+    # Compute the residual and store it into iTemp array
+    # The ghost points of iTemp are never written to, and hence remain 0
+    def calcResidual(self):
+        iTemp = self.iTemp[self.vLev][self.inner]
+
+        self.laplace(self.pData[self.vLev], iTemp)
+        np.subtract(self.rData[self.vLev], iTemp, out=iTemp)
+
+
+    # Restricts the data from an array of size 2^n + 1 to a smaller array of size 2^(n - 1) + 1
+    def restrict(self):
+        pLev = self.vLev
+        self.vLev += 1
+
+        # Full weighted restriction - this is the transpose of the interpolation operator used in prolong().
+        # Coarse point i lies on fine point 2i - 1, and its neighbours 2i - 2 and 2i are taken with half weight.
+        iTemp = self.iTemp[pLev]
+        rCoarse = self.rData[self.vLev]
+
+        if self.xfer[pLev] is not None:
+            self.restrictVec(pLev, iTemp[..., 1:-1])
+            return
+
+        if self.useJit:
+            mgKernels.restrictFW(asRows(iTemp), asRows(rCoarse))
+            return
+
+        np.add(iTemp[..., 0:-2:2], iTemp[..., 2::2], out=rCoarse)
+        rCoarse += iTemp[..., 1:-1:2]
+        rCoarse += iTemp[..., 1:-1:2]
+        rCoarse *= 0.25
+
+
+    # Computes the residual and restricts it directly to the RHS of the coarser level.
+    # This gives the same result as calling calcResidual() followed by restrict(), but with the compiled kernels,
+    # the residual of the whole fine level is never stored. For each coarse point i, the residual is computed only
+    # at the fine points 2i - 2, 2i - 1 and 2i, and combined straight into the RHS of the coarser level.
+    def restrictResidual(self):
+        fLev = self.vLev
+
+        if self.useJit and self.xfer[fLev] is None:
+            self.vLev += 1
+            rCoarse = self.rData[self.vLev]
+            if self.nuFlag or self.galFlag:
+                mgKernels.restrictResidualCoef(asRows(self.pData[fLev]), asRows(self.rData[fLev]), asRows(rCoarse), *self.lapCoef[fLev])
+            else:
+                mgKernels.restrictResidualUniform(asRows(self.pData[fLev]), asRows(self.rData[fLev]), asRows(rCoarse), self.hx2[fLev])
+            return
+
+        # NumPy can only fuse the two steps with strided passes over the fine level, which are slower than the full residual
+        self.calcResidual()
+        self.restrict()
+
+
+    # Restricts rVec from level fLev to the RHS of the next coarser level, when the two grids are not nested.
+    # The restriction operator is the transpose of linear interpolation, scaled by the ratio of grid spacings,
+    # so that it reduces to full weighting for nested grids.
+    def restrictVec(self, fLev, rVec):
+        rCoarse = self.rData[fLev+1]
+        wFine, wCoarse = self.wTemp[fLev], self.wTemp[fLev+1][..., :-1]
+        lIdx, rIdx, lWgt, rWgt = self.xfer[fLev]['prolong']
+        rStart = self.xfer[fLev]['start']
+
+        # Each fine point contributes to its two coarse neighbours, with the same weights as in interpolation
+        np.multiply(rVec, lWgt, out=wFine)
+        np.add.reduceat(wFine, rStart, axis=-1, out=rCoarse[..., :-1])
+        rCoarse[..., -1] = 0.0
+
+        np.multiply(rVec, rWgt, out=wFine)
+        np.add.reduceat(wFine, rStart, axis=-1, out=wCoarse)
+        rCoarse[..., 1:] += wCoarse
+
+        rCoarse *= self.hx[fLev]/self.hx[fLev+1]
+
 
+    # Solves at coarsest level using the Gauss-Seidel iterative solver
+    def solve(self):
+        # Use direct solver if asked to
+        if self.csType == 'TDMA' or self.csDirect:
+            return self.solveDirect()
 
-# Smoothens the solution sCount times using Gauss-Seidel smoother
-def smooth(sCount):
-    global N
-    global hx2
-    global vLev
-    global nuFlag
-    global xixx, xix2
-    global rData, pData
+        vLev = self.vLev
 
-    n = N[vLev]
-    for i in range(sCount):
-        imposeBC(pData[vLev])
+        # In single precision, the residual cannot fall much below the round-off error in applying the operator.
+        # So the tolerance is not allowed to go below that, or else the solver never converges.
+        tolVal = self.tolerance
+        if self.mixFlag:
+            aMax = 16.0*np.finfo(np.float32).eps*np.amax(np.abs(self.lapCoef[vLev][1]))
 
-        # Gauss-Seidel smoothing
-        if nuFlag:
+        jCnt, chkErr = 0, None
+        while True:
+            self.imposeBC(self.pData[vLev])
+
+            # Gauss-Seidel iterative solver, in lexicographic ordering
+            self.gsSweep(False)
+
+            resVal = self.laplace(self.pData[vLev], self.lTemp[vLev])
+            np.subtract(self.rData[vLev], resVal, out=resVal)
+            np.abs(resVal, out=resVal)
+
+            if self.mixFlag:
+                tolVal = max(self.tolerance, aMax*np.amax(np.abs(self.pData[vLev])))
+
+            maxErr = np.amax(resVal)
+            if maxErr < tolVal:
+                break
+
+            # The iterative solver can take long, so check if the solver was cancelled
+            if self.stopFlag:
+                return 1
+
+            # On strongly stretched grids, the operator at the coarsest level is far from diagonally dominant,
+            # and Gauss-Seidel may not converge at all. On large coarsest levels, it converges too slowly.
+            # So every rateCount iterations, the number of iterations needed is projected from the rate at which the
+            # residual fell, and if it exceeds maxCount, the level is solved directly, in this cycle and all later ones.
+            if jCnt % rateCount == 0:
+                if chkErr is not None:
+                    cRate = (maxErr/chkErr)**(1.0/rateCount)
+                    if not cRate < 1.0 or jCnt + np.log(tolVal/maxErr)/np.log(cRate) > self.maxCount:
+                        self.csDirect = True
+                        return self.solveDirect()
+
+                chkErr = maxErr
+
+            jCnt += 1
+            if jCnt > self.maxCount or not np.isfinite(maxErr):
+                self.csDirect = True
+                return self.solveDirect()
+
+        if self.profFlag:
+            self.mgProf.addIterations(vLev, jCnt + 1)
+
+        self.imposeBC(self.pData[vLev])
+
+        return 0
+
+
+    # Direct solver of the coarsest level, which is the Thomas algorithm in 1D
+    def solveDirect(self):
+        return self.solveTDMA()
+
+
+    # Solves at coarsest level directly using the Thomas algorithm for tridiagonal systems
+    def solveTDMA(self):
+        vLev = self.vLev
+        n = self.N[vLev]
+
+        # Factorize the operator of this level only once and reuse it thereafter
+        if vLev not in self.tdmaFac:
+            self.tdmaFac[vLev] = self.factorTDMA(vLev)
+
+        aLow, cMod, dInv = self.tdmaFac[vLev]
+
+        # The ghost points are eliminated from the system using the BC in imposeBC().
+        # For non-homogenous BC, the wall values are moved to the RHS.
+        dVec = self.lTemp[vLev]
+        np.copyto(dVec, self.rData[vLev])
+        if not self.zeroBC:
+            aW, aC, aE = self.lapCoef[vLev]
+            dVec[..., 0] -= 2.0*self.pWall*aW[0]
+            dVec[..., -1] -= 2.0*self.pWall*aE[-1]
+
+        # Forward substitution, with grid index first as in gsSweep()
+        dT = dVec.T
+        dT[0] *= dInv[0]
+        for i in range(1, n):
+            dT[i] = (dT[i] - aLow[i]*dT[i-1])*dInv[i]
+
+        # Back substitution
+        for i in range(n-2, -1, -1):
+            dT[i] -= cMod[i]*dT[i+1]
+
+        self.pData[vLev][..., 1:-1] = dVec
+        self.imposeBC(self.pData[vLev])
+
+        return 0
+
+
+    # Returns the coefficients of the 3-point stencil of laplace() at level vLev
+    def lapCoeffs(self, vLev):
+        n = self.N[vLev]
+        hx, hx2 = self.hx[vLev], self.hx2[vLev]
+
+        if self.nuFlag:
             # For non-uniform grid
-            for j in range(1, n+1):
-                pData[vLev][j] = (xix2[vLev][j-1]*(pData[vLev][j+1] + pData[vLev][j-1])*2.0 +
-                                  xixx[vLev][j-1]*(pData[vLev][j+1] - pData[vLev][j-1])*hx[vLev] -
-                                 rData[vLev][j-1]*2.0*hx2[vLev]) / (4.0*xix2[vLev][j-1])
+            aW = self.xix2[vLev]/hx2 - self.xixx[vLev]/(2.0*hx)
+            aC = -2.0*self.xix2[vLev]/hx2
+            aE = self.xix2[vLev]/hx2 + self.xixx[vLev]/(2.0*hx)
         else:
             # For uniform grid
-            for j in range(1, n+1):
-                pData[vLev][j] = (pData[vLev][j+1] + pData[vLev][j-1] - hx2[vLev]*rData[vLev][j-1])*0.5
+            aW = np.ones(n)/hx2
+            aC = -2.0*np.ones(n)/hx2
+            aE = np.ones(n)/hx2
 
-    imposeBC(pData[vLev])
+        return aW, aC, aE
 
 
-# Compute the residual and store it into iTemp array
-def calcResidual():
-    global vLev
-    global iTemp, rData, pData
+    # LU factorization of the tridiagonal operator at level vLev for the Thomas algorithm
+    def factorTDMA(self, vLev):
+        n = self.N[vLev]
+        aW, aC, aE = self.lapCoef[vLev]
 
-    iTemp[vLev].fill(0.0)
-    iTemp[vLev][1:-1] = rData[vLev] - laplace(pData[vLev])
+        # Sub-diagonal, diagonal and super-diagonal of the system after eliminating ghost points.
+        # Since imposeBC() sets P[0] = C - P[2] and P[-1] = C - P[-3], the ghost point
+        # coefficients get folded into the neighbouring interior point.
+        aLow = np.copy(aW)
+        aDia = np.copy(aC)
+        aUpp = np.copy(aE)
 
+        aUpp[0] -= aW[0]
+        aLow[-1] -= aE[-1]
+        aLow[0] = 0.0
+        aUpp[-1] = 0.0
 
-# Restricts the data from an array of size 2^n + 1 to a smaller array of size 2^(n - 1) + 1
-def restrict():
-    global N
-    global vLev
-    global iTemp, rData
+        # Modified super-diagonal and inverse of modified diagonal
+        cMod = np.zeros(n)
+        dInv = np.zeros(n)
 
-    pLev = vLev
-    vLev += 1
+        dInv[0] = 1.0/aDia[0]
+        cMod[0] = aUpp[0]*dInv[0]
+        for i in range(1, n):
+            dInv[i] = 1.0/(aDia[i] - aLow[i]*cMod[i-1])
+            cMod[i] = aUpp[i]*dInv[i]
 
-    # Full weighted restriction - this is the transpose of the interpolation operator used in prolong().
-    for i in range(1, N[vLev] + 1):
-        i2 = i*2
-        rData[vLev][i-1] = 0.5*iTemp[pLev][i2 - 1] + 0.25*(iTemp[pLev][i2 - 2] + iTemp[pLev][i2])
+        return aLow, cMod, dInv
 
 
-# Solves at coarsest level using the Gauss-Seidel iterative solver
-def solve():
-    global vLev
-    global nuFlag
-    global N, hx2
-    global maxCount
-    global tolerance
-    global qtConsole
-    global pData, rData
+    # Interpolates the data from an array of size 2^n + 1 to a larger array of size 2^(n + 1) + 1
+    def prolong(self):
+        pLev = self.vLev
+        self.vLev -= 1
 
-    n = N[vLev]
-    solLap = np.zeros(n)
+        n = self.N[pLev]
+        pFine, pCoarse = self.pData[self.vLev], self.pData[pLev]
 
-    jCnt = 0
-    while True:
-        imposeBC(pData[vLev])
+        # For grids that are not nested, use linear interpolation at all points
+        if self.xfer[self.vLev] is not None:
+            interpolate(pCoarse[..., 1:-1], pFine[..., 1:-1], *self.xfer[self.vLev]['prolong'], self.wTemp[self.vLev])
+            return
 
-        # Gauss-Seidel iterative solver
-        if nuFlag:
-            # For non-uniform grid
-            for i in range(1, n+1):
-                pData[vLev][i] = (xix2[vLev][i-1]*(pData[vLev][i+1] + pData[vLev][i-1])*2.0 +
-                                  xixx[vLev][i-1]*(pData[vLev][i+1] - pData[vLev][i-1])*hx[vLev] -
-                                 rData[vLev][i-1]*2.0*hx2[vLev]) / (4.0*xix2[vLev][i-1])
+        if self.useJit:
+            mgKernels.prolongLinear(asRows(pCoarse), asRows(pFine))
+            return
+
+        # For coincident points, transfer the data as it is.
+        # For mid-points, use linear interpolation.
+        np.copyto(pFine[..., 1:-1:2], pCoarse[..., 1:n+1])
+        np.add(pCoarse[..., 1:n], pCoarse[..., 2:n+1], out=pFine[..., 2:-1:2])
+        pFine[..., 2:-1:2] *= 0.5
+
+
+    # Computes the 1D laplacian of function at the finest level in double precision, using aTemp as workspace.
+    # This is used when the solution is kept apart from the arrays of the cycles.
+    def fineLaplace(self, function, laplacian):
+        aW, aC, aE = self.refCoef
+        n = self.N[0]
+
+        np.multiply(aC, function[..., 1:n+1], out=laplacian)
+        np.multiply(aW, function[..., :n], out=self.aTemp)
+        laplacian += self.aTemp
+        np.multiply(aE, function[..., 2:], out=self.aTemp)
+        laplacian += self.aTemp
+
+        return laplacian
+
+
+    # Computes the 1D laplacian of function
+    # The result is written to laplacian if it is given, and a new array is allocated otherwise
+    def laplace(self, function, laplacian=None):
+        vLev = self.vLev
+        n = self.N[vLev]
+
+        if laplacian is None:
+            laplacian = np.zeros(function.shape[:-1] + (n,))
+
+        if self.useJit:
+            if self.nuFlag or self.galFlag:
+                mgKernels.laplaceCoef(asRows(function), asRows(laplacian), *self.lapCoef[vLev])
+            else:
+                mgKernels.laplaceUniform(asRows(function), asRows(laplacian), self.hx2[vLev])
+
+        elif self.nuFlag or self.galFlag:
+            # For non-uniform grid or Galerkin operators, use the 3-point stencil of this level
+            aW, aC, aE = self.lapCoef[vLev]
+            wTemp = self.wTemp[vLev]
+
+            np.multiply(aC, function[..., 1:n+1], out=laplacian)
+            np.multiply(aW, function[..., :n], out=wTemp)
+            laplacian += wTemp
+            np.multiply(aE, function[..., 2:], out=wTemp)
+            laplacian += wTemp
         else:
             # For uniform grid
-            for i in range(1, n+1):
-                pData[vLev][i] = (pData[vLev][i+1] + pData[vLev][i-1] - hx2[vLev]*rData[vLev][i-1])*0.5
+            np.add(function[..., 2:], function[..., :n], out=laplacian)
+            laplacian -= function[..., 1:n+1]
+            laplacian -= function[..., 1:n+1]
+            laplacian /= self.hx2[vLev]
+
+        return laplacian
+
+
+    # Initialize the arrays used in MG algorithm
+    # bShape is the shape of the batch of RHS solved together, and is empty for a single RHS
+    def initVariables(self, bShape=()):
+        nList = np.array(self.N)
+
+        # Refuse to allocate arrays that can't fit in memory, rather than bring the machine down by swapping
+        memVal, memFree = self.memEstimate(int(np.prod(bShape))), availMemory()
+        if memFree is not None and memVal > memFree:
+            raise MemoryError("Grid of {0} points needs about {1:.2f} MB of memory, but only {2:.2f} MB is available".format(
+                              "x".join([str(self.N[0])]*self.nDim), memVal/2**20, memFree/2**20))
+
+        self.bShape = bShape
+
+        # Compiled kernels work on 2D arrays, with one row for each RHS
+        self.useJit = self.jitFlag and len(bShape) <= 1 and self.nDim == 1 and loadKernels()
+
+        # Arrays used by the cycles are in single precision in mixed precision mode
+        dType = np.float32 if self.mixFlag else np.float64
+
+        # Arrays of the finest level are mapped to files if mmapDir is set
+        rShape = [bShape + (x,)*self.nDim for x in nList]
+        pShape = [bShape + (x,)*self.nDim for x in nList + 2]
+
+        self.rData = [self.newArray(x, dType, i == 0) for i, x in enumerate(rShape)]
+        self.pData = [self.newArray(x, dType, i == 0) for i, x in enumerate(pShape)]
+
+        self.sData = [self.newArray(x, dType, i == 0) for i, x in enumerate(pShape)]
+        self.iTemp = [self.newArray(x, dType, i == 0) for i, x in enumerate(pShape)]
+
+        # Workspace arrays of the size of interior points at each level.
+        # Laplacian and residual are computed into lTemp, while wTemp holds intermediate values.
+        # These are reused in every cycle, so that cycles don't allocate any new arrays.
+        self.lTemp = [self.newArray(x, dType, i == 0) for i, x in enumerate(rShape)]
+        self.wTemp = [self.newArray(x, dType, i == 0) for i, x in enumerate(rShape)]
+
+        # Directions of the Chebyshev smoother
+        if self.smType == 'CHEB':
+            self.cData = [self.newArray(x, dType, i == 0) for i, x in enumerate(rShape)]
+
+        # Solution and RHS at the finest level, in double precision.
+        # Unless they are kept apart, these are the same arrays as pData[0] and rData[0].
+        # Else, rTemp holds the residual of the solution, and aTemp is workspace for computing it.
+        # Both are needed only between cycles, when the arrays of the cycles at the finest level are free.
+        # So they share memory with lTemp and wTemp, or in mixed precision, where each takes the memory of
+        # two arrays of single precision, with pData and sData, and with lTemp and wTemp.
+        if self.sepSoln:
+            self.pSoln = self.newArray(pShape[0], np.float64, True)
+            self.rSoln = self.newArray(rShape[0], np.float64, True)
+            if self.mixFlag:
+                self.rTemp = self.pairArrays(self.pData, self.sData)[self.inner]
+                self.aTemp = self.pairArrays(self.lTemp, self.wTemp)
+            else:
+                self.rTemp, self.aTemp = self.lTemp[0], self.wTemp[0]
+        else:
+            self.pSoln = self.pData[0]
+            self.rSoln = self.rData[0]
 
-        maxErr = np.amax(np.abs(rData[vLev] - laplace(pData[vLev])))
-        if maxErr < tolerance:
-            break
+        # Vectors of the Krylov solvers, and an array with ghost points to apply the operator
+        if self.solMode != 'MG':
+            self.kData = [self.newArray(rShape[0], np.float64, True) for x in range(7)]
+            self.kGhost = self.newArray(pShape[0], np.float64, True)
+
+        # Residual after each V-cycle
+        self.rConv = np.zeros((self.vcCnt,) + bShape)
 
-        jCnt += 1
-        if jCnt > maxCount:
-            if qtConsole:
-                qtConsole.updateTEdit("MAYDAY! Iterative solver refuses to converge.\n")
-            else:
-                print("MAYDAY! Iterative solver refuses to converge.\n")
-            return 1
 
-    imposeBC(pData[vLev])
+    # Returns an array of zeros in double precision, whose memory holds the single precision arrays of the finest level
+    # in aList and bList, one after the other. These are replaced in the lists by the new views of the same shape.
+    def pairArrays(self, aList, bList):
+        dArr = self.newArray(aList[0].shape, np.float64, True)
+        dWords = dArr.reshape(-1).view(np.float32)
+
+        aList[0] = dWords[:dArr.size].reshape(dArr.shape)
+        bList[0] = dWords[dArr.size:].reshape(dArr.shape)
 
-    return 0
+        return dArr
 
 
-# Interpolates the data from an array of size 2^n + 1 to a larger array of size 2^(n + 1) + 1
-def prolong():
-    global N
-    global vLev
-    global pData
+    # Returns an array of zeros. If mmFlag is True and mmapDir is set, the array is mapped to an
+    # anonymous temporary file in mmapDir, which is removed once the array is no longer in use.
+    def newArray(self, aShape, dType, mmFlag=False):
+        if mmFlag and self.mmapDir:
+            return np.memmap(tempfile.TemporaryFile(dir=self.mmapDir), dtype=dType, mode='w+', shape=aShape)
+
+        return np.zeros(aShape, dtype=dType)
+
+
+    # Initialize the grid. This is relevant only for non-uniform grids.
+    # The grid hierarchy is fetched from the cache if a solver with the same grid was created before.
+    def initGrid(self):
+        gKey = (self.N[0], self.VDepth, self.nuFlag, self.beta if self.nuFlag else None, self.galFlag)
+
+        gData = hierCache.get(gKey) if cacheSize else None
+        if gData is None:
+            gData = self.makeGrid()
+
+            # Cached arrays are shared between solvers, so they must never be modified in place
+            for gArr in gData['xPts'] + gData['xixx'] + gData['xix2'] + list(sum(gData['lapCoef'] + gData['gsCoef'], ())) + gData['jacCoef']:
+                gArr.flags.writeable = False
+
+            if cacheSize:
+                hierCache.put(gKey, gData)
+
+        self.xPts, self.xixx, self.xix2 = gData['xPts'], gData['xixx'], gData['xix2']
+        self.xfer = gData['xfer']
+        self.lapCoef, self.gsCoef = gData['lapCoef'], gData['gsCoef']
+        self.jacCoef = gData['jacCoef']
+
+        # Factorizations of the operator at each level, used by direct solver.
+        # They are computed when first needed, and shared through the cache like the rest of the hierarchy.
+        self.tdmaFac = gData['tdmaFac']
+
+        # Double precision stencil at the finest level, used when the solution is kept apart
+        self.refCoef = self.lapCoef[0]
+
+        # In mixed precision mode, the cycles use single precision copies of the coefficients they need.
+        # The stencil of the coarsest level is always copied, for the coarse solver.
+        if self.mixFlag:
+            mixCopy = self.mixCoefs()
+            self.lapCoef = [tuple(x.astype(np.float32) for x in aCoef) if mixCopy['lapCoef'] or i == self.VDepth else aCoef
+                            for i, aCoef in enumerate(self.lapCoef)]
+            if mixCopy['gsCoef']:
+                self.gsCoef = [tuple(x.astype(np.float32) for x in aCoef) for aCoef in self.gsCoef]
+            if mixCopy['jacCoef']:
+                self.jacCoef = [x.astype(np.float32) for x in self.jacCoef]
+
+            # The factors computed from single precision coefficients are not shared with other solvers
+            self.tdmaFac = {}
+
+
+    # Coefficients of which the cycles use single precision copies in mixed precision mode.
+    # On uniform grids, laplace() and Gauss-Seidel sweeps use the grid spacing alone.
+    # The coefficients that are not copied are left in double precision.
+    def mixCoefs(self):
+        return {'lapCoef': self.nuFlag or self.galFlag,
+                'gsCoef': self.smType == 'RBGS' or self.galFlag,
+                'jacCoef': self.smType in ['JAC', 'CHEB']}
+
+
+    # Compute the grid points, metric terms and operator coefficients at all levels
+    def makeGrid(self):
+        N = self.N
+        beta = self.beta
+
+        # Operators to transfer data between each level and the next coarser one.
+        # This is None if the points of the coarser level lie on alternate points of the finer one.
+        self.xfer = [None if N[i] == 2*N[i+1] - 1 else transferOps(N[i], N[i+1]) for i in range(len(N) - 1)]
+
+        # Uniform grid default values
+        xPts = [np.linspace(0.0, 1.0, n) for n in N]
+        xi_x = [np.ones_like(i) for i in xPts]
+        xix2 = [np.ones_like(i) for i in xPts]
+        xixx = [np.zeros_like(i) for i in xPts]
+
+        # Overwrite above arrays with values for tangent-hyperbolic grid is nuFlag is enabled.
+        if self.nuFlag:
+            for i in range(len(N)):
+                # For coarser grids whose points lie on the finer grid, simply use the values at every even index of the finer grid array.
+                if i and self.xfer[i-1] is None:
+                    xPts[i] = xPts[i-1][::2]
+                    xi_x[i] = xi_x[i-1][::2]
+                    xixx[i] = xixx[i-1][::2]
+                    xix2[i] = xix2[i-1][::2]
+                    continue
+
+                # Calculate the values for finest grid, and other grids that are not nested.
+                xPts[i], xi_x[i], xixx[i], xix2[i] = tanhGrid(N[i], beta)
+
+        # lapCoeffs() reads the metric terms from self
+        self.xixx, self.xix2 = xixx, xix2
+
+        # Coefficients of the 3-point stencil of laplace() at each level.
+        # The Gauss-Seidel update, P = (R - aW*P_west - aE*P_east)/aC, is also written in terms of these.
+        lapCoef = [self.lapCoeffs(x) for x in range(len(N))]
+
+        # Galerkin operators of coarser levels are computed one level at a time from the finest one.
+        # Their ghost points are eliminated with homogenous BC, which is the BC of all coarser levels in a cycle.
+        # On grids that are not nested, R.A.P is not tridiagonal, so the operator discretized on that level is used.
+        if self.galFlag:
+            for i in range(len(N) - 1):
+                if self.xfer[i] is None:
+                    lapCoef[i+1] = galerkinCoeffs(elimGhosts(lapCoef[i]), N[i+1])
+                else:
+                    lapCoef[i+1] = elimGhosts(lapCoef[i+1])
+
+        gsCoef = [(-aW/aC, -aE/aC, 1.0/aC) for aW, aC, aE in lapCoef]
+
+        # Weight of damped Jacobi smoother at each point, divided by the diagonal of the operator.
+        # The weight 4/(3*eMax) damps the upper half of the eigenvalues in [0, eMax] the most, and is 2/3 for the uniform grid.
+        # The bound eMax of each row is from Gershgorin's theorem, with the ghost points eliminated, as the points next
+        # to the walls are coupled to the ghost points. Rows that are barely coupled to their neighbours are not over-relaxed.
+        # With these weights, the eigenvalues of the damped Jacobi iteration matrix are at most 4/3 on any grid.
+        jacCoef = []
+        for aW, aC, aE in (elimGhosts(x) for x in lapCoef):
+            eMax = 1.0 + (np.abs(aW) + np.abs(aE))/np.abs(aC)
+            jacCoef.append(np.minimum(1.0, 4.0/(3.0*eMax))/aC)
+
+        return {'xPts': xPts, 'xixx': xixx, 'xix2': xix2, 'xfer': self.xfer,
+                'lapCoef': lapCoef, 'gsCoef': gsCoef, 'jacCoef': jacCoef, 'tdmaFac': {}}
+
+
+    ############################## BOUNDARY CONDITION ###############################
+
+
+    # The name of this function is self-explanatory. It imposes BC on P
+    def imposeBC(self, P):
+        if self.useJit:
+            mgKernels.dirichletBC(asRows(P), self.pWall, self.zeroBC)
+
+        # Dirichlet BC
+        elif self.zeroBC:
+            # Homogenous BC
+            P[..., 0] = -P[..., 2]
+            P[..., -1] = -P[..., -3]
+        else:
+            # Non-homogenous BC
+            P[..., 0] = 2.0*self.pWall - P[..., 2]
+            P[..., -1] = 2.0*self.pWall - P[..., -3]
+
 
-    pLev = vLev
-    vLev -= 1
+    ############################### TEST CASE DETAIL ################################
 
-    # For coincident points, transfer the data as it is.
-    # For mid-points, use linear interpolation.
-    for i in range(1, N[vLev] + 1):
-        i2 = int(i/2) + 1;
-        if i % 2:
-            pData[vLev][i] = pData[pLev][i2]
-        else:
-            pData[vLev][i] = (pData[pLev][i2] + pData[pLev][i2 - 1])*0.5;
 
+    # Calculate the analytical solution and its corresponding Dirichlet BC values
+    def initDirichlet(self):
+        # Compute analytical solution, (r^2)/2
+        xDist = self.xPts[0] - 0.5
+        self.pAnlt = xDist*xDist/2.0
 
-# Computes the 1D laplacian of function
-def laplace(function):
-    global vLev
-    global nuFlag
-    global N, hx2
-    global xixx, xix2
+        # Value of P at wall according to analytical solution
+        self.pWall = self.pAnlt[0]
 
-    n = N[vLev]
 
-    laplacian = np.zeros(n)
-    if nuFlag:
-        # For non-uniform grid
-        laplacian = xix2[vLev]*(function[2:] - 2.0*function[1:n+1] + function[:n]) / hx2[vLev] + \
-                    xixx[vLev]*(function[2:] - function[:n]) / (2.0*hx[vLev])
-    else:
-        # For uniform grid
-        laplacian = (function[2:] - 2.0*function[1:n+1] + function[:n]) / hx2[vLev]
+    # Compute the error in pSoln w.r.t the analytical solution
+    # For a batch of solutions, the error of each of them is returned
+    def computeError(self, pSoln):
+        pErr = self.pAnlt - pSoln[self.inner]
+        errVal = np.amax(pErr, axis=self.gridAxes)
 
-    return laplacian
+        self.writeOut("Error in solution after this endeavour is {0:.4e}".format(np.amax(errVal)))
 
+        return errVal
 
-# Initialize the arrays used in MG algorithm
-def initVariables():
-    global N
-    global pData, rData, sData, iTemp
 
-    nList = np.array(N)
+    ############################### PLOTTING ROUTINE ################################
 
-    rData = [np.zeros(x) for x in nList]
-    pData = [np.zeros(x) for x in nList + 2]
 
-    sData = [np.zeros_like(x) for x in pData]
-    iTemp = [np.zeros_like(x) for x in pData]
+    # Surprise! This function.... plots!
+    # plotType = 0: Plot computed and analytic solution together
+    # plotType = 1: Plot error in computed solution w.r.t. analytic solution
+    # plotType = 2: Plot convergence of residual against multigrid cycles
+    # Any other value for plotType, and the function will barf.
+    # Each type of plot has its own figure, which is reused when the same type is plotted again.
+    def plotResult(self, plotType):
+        import matplotlib.pyplot as plt
 
+        if plotType == 2:
+            self.plotResidual()
+            plt.show()
+            return
 
-# Initialize the grid. This is relevant only for non-uniform grids
-def initGrid():
-    global N
-    global beta
-    global nuFlag
-    global xPts, xixx, xix2
+        xPts, pAnlt, pSoln = self.plotLine()
 
-    # Uniform grid default values
-    xPts = [np.linspace(0.0, 1.0, n) for n in N]
-    xi_x = [np.ones_like(i) for i in xPts]
-    xix2 = [np.ones_like(i) for i in xPts]
-    xixx = [np.zeros_like(i) for i in xPts]
+        fig = self.plotFigure(['MG-Lite Solution', 'MG-Lite Error'][plotType])
+        fig.clf()
 
-    # Overwrite above arrays with values for tangent-hyperbolic grid is nuFlag is enabled.
-    if nuFlag:
-        # Calculate the values for finest grid.
-        xi = np.linspace(0.0, 1.0, N[0])
-        xPts[0] = np.array([(1.0 - np.tanh(beta*(1.0 - 2.0*i))/np.tanh(beta))/2.0 for i in xi])
-        xi_x[0] = np.array([np.tanh(beta)/(beta*(1.0 - ((1.0 - 2.0*k)*np.tanh(beta))**2.0)) for k in xPts[0]])
-        xixx[0] = np.array([-4.0*(np.tanh(beta)**3.0)*(1.0 - 2.0*k)/(beta*(1.0 - (np.tanh(beta)*(1.0 - 2.0*k))**2.0)**2.0) for k in xPts[0]])
-        xix2[0] = np.array([k*k for k in xi_x[0]])
+        # Large grids are decimated to about 2 points per pixel along the width of the figure
+        maxPts = int(2*fig.get_figwidth()*fig.dpi)
 
-        # For coarser grids, simply use the values at every even index of the finer grid array.
-        for i in range(1, VDepth+1):
-            xPts[i] = xPts[i-1][::2]
-            xi_x[i] = xi_x[i-1][::2]
-            xixx[i] = xixx[i-1][::2]
-            xix2[i] = xix2[i-1][::2]
+        # Plot the computed solution on top of the analytic solution.
+        if plotType == 0:
+            self.plotCurve(plt.plot, *decimate(xPts, pAnlt, maxPts), label='Analytic', marker='*')
+            for pVal in pSoln:
+                self.plotCurve(plt.plot, *decimate(xPts, pVal, maxPts), label='Computed', marker='+')
 
+            plt.xlabel('x', fontsize=40)
+            plt.ylabel('p', fontsize=40)
 
-############################## BOUNDARY CONDITION ###############################
+        # Plot the error in computed solution with respect to analytic solution.
+        elif plotType == 1:
+            for pVal in pSoln:
+                pErr = np.abs(pAnlt - pVal)
+                self.plotCurve(plt.semilogy, *decimate(xPts, pErr, maxPts), label='Error', marker='*')
 
+            plt.xlabel('x', fontsize=40)
+            plt.ylabel('e_p', fontsize=40)
 
-# The name of this function is self-explanatory. It imposes BC on P
-def imposeBC(P):
-    global pWall
-    global zeroBC
+        plt.xticks(fontsize=30)
+        plt.yticks(fontsize=30)
+        plt.legend(fontsize=40)
+        plt.show()
 
-    # Dirichlet BC
-    if zeroBC:
-        # Homogenous BC
-        P[0] = -P[2]
-        P[-1] = -P[-3]
-    else:
-        # Non-homogenous BC
-        P[0] = 2.0*pWall - P[2]
-        P[-1] = 2.0*pWall - P[-3]
 
+    # The grid points, analytic solution and computed solution plotted by plotResult().
+    # The computed solution has one row for each RHS.
+    def plotLine(self):
+        return self.xPts[0], self.pAnlt, self.pSoln[..., 1:-1].reshape(-1, self.N[0])
 
-############################### TEST CASE DETAIL ################################
 
+    # Plot the residual of the first cCount cycles, or of all the cycles if cCount is None.
+    # The lines already in the figure are updated when possible, so that this function can be set as
+    # cycleHook to watch the convergence while the solver runs. It must be called from the GUI thread.
+    def plotResidual(self, cCount=None, resVal=None):
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import MaxNLocator
 
-# Calculate the analytical solution and its corresponding Dirichlet BC values
-def initDirichlet():
-    global N
-    global hx
-    global xPts
-    global pWall, pAnlt
+        fig = self.plotFigure('MG-Lite Residual')
+        axes = fig.gca()
 
-    # Compute analytical solution, (r^2)/2
-    pAnlt = np.zeros(N[0])
+        rConv = self.rConv[:cCount].reshape(-1, int(np.prod(self.bShape)))
+        vcAxis = np.arange(len(rConv)) + 1
 
-    for i in range(N[0]):
-        xDist = xPts[0][i] - 0.5
-        pAnlt[i] = xDist*xDist/2.0
+        if len(axes.lines) == rConv.shape[1]:
+            for rLine, rVal in zip(axes.lines, rConv.T):
+                rLine.set_data(vcAxis, rVal)
 
-    # Value of P at wall according to analytical solution
-    pWall = pAnlt[0]
+            axes.relim()
+            axes.autoscale_view()
+        else:
+            fig.clf()
+            for rVal in rConv.T:
+                self.plotCurve(plt.semilogy, vcAxis, rVal, label='Residual', marker='*')
 
+            plt.xlabel(self.cycType + '-Cycles' if self.solMode == 'MG' else self.solMode + ' iterations', fontsize=40)
+            plt.ylabel('Residual', fontsize=40)
 
-# Compute the error in pSoln w.r.t the analytical solution
-def computeError(pSoln):
-    global pAnlt
-    global qtConsole
+            axes = plt.gca()
+            axes.xaxis.set_major_locator(MaxNLocator(integer=True))
 
-    pErr = pAnlt - pSoln[1:-1]
-    errVal = np.amax(pErr)
+            plt.xticks(fontsize=30)
+            plt.yticks(fontsize=30)
+            plt.legend(fontsize=40)
 
-    if qtConsole:
-        qtConsole.updateTEdit("Error in solution after this endeavour is {0:.4e}".format(errVal))
-    else:
-        print("Error in solution after this endeavour is {0:.4e}".format(errVal))
+        # Redraw without blocking, so that the solver can go on
+        fig.canvas.draw_idle()
+        fig.canvas.flush_events()
+        if cCount is not None:
+            plt.show(block=False)
 
 
-############################### PLOTTING ROUTINE ################################
+    # Returns the figure of the given name, which is created the first time and reused thereafter
+    def plotFigure(self, figName):
+        import matplotlib.pyplot as plt
 
+        plt.rcParams["font.family"] = "Times New Roman"
+        plt.rcParams["mathtext.fontset"] = 'cm'
+        plt.rcParams["font.weight"] = "medium"
 
-# Surprise! This function.... plots!
-# plotType = 0: Plot computed and analytic solution together
-# plotType = 1: Plot error in computed solution w.r.t. analytic solution
-# plotType = 2: Plot convergence of residual against V-Cycles
-# Any other value for plotType, and the function will barf.
-def plotResult(plotType):
-    global N
-    global xPts
-    global pAnlt
-    global pData
-    global rConv
-
-    plt.rcParams["font.family"] = "Times New Roman"
-    plt.rcParams["mathtext.fontset"] = 'cm'
-    plt.rcParams["font.weight"] = "medium"
-
-    plt.figure(figsize=(13, 9))
-
-    pSoln = pData[0]
-    # Plot the computed solution on top of the analytic solution.
-    if plotType == 0:
-        plt.plot(xPts[0], pAnlt, label='Analytic', marker='*', markersize=20, linewidth=4)
-        plt.plot(xPts[0], pSoln[1:-1], label='Computed', marker='+', markersize=20, linewidth=4)
-        plt.xlabel('x', fontsize=40)
-        plt.ylabel('p', fontsize=40)
-
-    # Plot the error in computed solution with respect to analytic solution.
-    elif plotType == 1:
-        pErr = np.abs(pAnlt - pSoln[1:-1])
-        plt.semilogy(xPts[0], pErr, label='Error', marker='*', markersize=20, linewidth=4)
-        plt.xlabel('x', fontsize=40)
-        plt.ylabel('e_p', fontsize=40)
-
-    # Plot the convergence of residual
-    elif plotType == 2:
-        vcAxis = np.arange(len(rConv)) + 1
-        plt.semilogy(vcAxis, rConv, label='Residual', marker='*', markersize=20, linewidth=4)
-        plt.xlabel('V-Cycles', fontsize=40)
-        plt.ylabel('Residual', fontsize=40)
+        return plt.figure(num=figName, figsize=(13, 9))
 
-        axes = plt.gca()
-        axes.xaxis.set_major_locator(MaxNLocator(integer=True))
 
-    plt.xticks(fontsize=30)
-    plt.yticks(fontsize=30)
-    plt.legend(fontsize=40)
-    plt.show()
+    # Plot a curve with the style used in all plots.
+    # Markers are drawn at no more than about 50 points, so that they don't hide the curve on large grids.
+    def plotCurve(self, plotFunc, xVals, yVals, **pArgs):
+        plotFunc(xVals, yVals, markersize=20, linewidth=4, markevery=max(1, len(xVals)//50), **pArgs)
 
 ############################## THAT'S IT, FOLKS!! ###############################
 
 if __name__ == '__main__':
-    main(False)
+    sys.exit(cliMain())
 
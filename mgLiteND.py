@@ -0,0 +1,515 @@
+#!/usr/bin/python3
+
+#################################################################################
+# MG-Lite
+#
+# Copyright (C) 2020, Roshan J. Samuel
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     1. Redistributions of source code must retain the above copyright
+#        notice, this list of conditions and the following disclaimer.
+#     2. Redistributions in binary form must reproduce the above copyright
+#        notice, this list of conditions and the following disclaimer in the
+#        documentation and/or other materials provided with the distribution.
+#     3. Neither the name of the copyright holder nor the
+#        names of its contributors may be used to endorse or promote products
+#        derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#################################################################################
+
+
+# Multigrid solver of the Poisson equation in 2D and 3D, built on the solver of mgLite.py.
+# The cycles, tolerances and parameters are exactly those of multigridSolver, and only the operations
+# at each level (smoothing, residual, restriction, prolongation and BC) are replaced by their
+# counterparts in more dimensions.
+
+# Import all necessary modules
+import itertools
+import numpy as np
+import mgLite as mgSolver
+
+############################### GLOBAL CONSTANTS ################################
+
+# Number of dimensions of the test case solved when this file is run directly.
+# All other parameters take the default values set in mgLite.py
+nDim = 2
+
+# Largest number of points of the coarsest level for which it can be solved directly, when Gauss-Seidel fails to converge.
+# The inverse of its operator takes 8*maxDirect^2 bytes.
+maxDirect = 1000
+
+##################################### MAIN ######################################
+
+def main():
+    mgRun = multigridSolverND(nDim=nDim)
+    mgRun.run()
+
+
+# Index of the view of an array that takes kSlice along axis k of a grid of nDim dimensions, with lSlice along
+# the axes before it and rSlice along the axes after it. Leading axes of a batch of RHS are taken as they are.
+def axisView(nDim, k, kSlice, lSlice=slice(None), rSlice=slice(None)):
+    return (Ellipsis,) + (lSlice,)*k + (kSlice,) + (rSlice,)*(nDim - k - 1)
+
+
+# The analytic solution of the test case, which is the sum of (x - 0.5)^2/(2*nDim) along all the axes,
+# so that its laplacian is 1 everywhere. xList has the points along each axis, and the solution is
+# computed at all points of the grid they make.
+def testSoln(xList):
+    nDim = len(xList)
+
+    pVal = 0.0
+    for k, xPts in enumerate(xList):
+        xDist = (xPts - 0.5).reshape((-1,) + (1,)*(nDim - k - 1))
+        pVal = pVal + xDist*xDist/(2.0*nDim)
+
+    return pVal
+
+
+# Make all the arrays in a (possibly nested) list or tuple of arrays read-only
+def lockArrays(gData):
+    if isinstance(gData, np.ndarray):
+        gData.flags.writeable = False
+
+    elif isinstance(gData, (list, tuple)):
+        for x in gData:
+            lockArrays(x)
+
+
+############################## MULTI-GRID SOLVER ###############################
+
+
+# The multigrid solver in nDim dimensions, on the unit square or cube.
+# The grid has the same number of points along each axis, and each axis is stretched separately.
+# nuFlag and beta are either a single value for all axes, or a sequence with one value for each axis.
+# Galerkin operators, the Thomas algorithm as coarse solver (csType = 'TDMA'), Krylov solvers, levels that are not nested and the
+# compiled kernels are available only in 1D.
+# Gauss-Seidel smoothing always uses red-black ordering, since lexicographic ordering can't be vectorized.
+class multigridSolverND(mgSolver.multigridSolver):
+    def __init__(self, oConsole=False, nDim=2, **mgParams):
+        self.nDim = nDim
+
+        super().__init__(oConsole, **mgParams)
+
+
+    def initGlobals(self):
+        super().initGlobals()
+
+        if self.galFlag:
+            raise ValueError("Galerkin operators are available only in 1D")
+
+        if self.csType != 'GS':
+            raise ValueError("Only the Gauss-Seidel coarse solver is available in more than 1D")
+
+        if self.solMode != 'MG':
+            raise ValueError("Krylov solvers are available only in 1D")
+
+        if any(x != 2*y - 1 for x, y in zip(self.N[:-1], self.N[1:])):
+            raise ValueError("Grid of {0:d} points doesn't have nested levels, as needed in more than 1D".format(self.N[0]))
+
+        # A coarsest level too large to solve directly is left to Gauss-Seidel, which needs O(n^2) iterations there
+        if self.N[-1]**self.nDim > maxDirect:
+            self.maxCount = max(1000, 10*self.N[-1]**2)
+
+        # Stretching flag and parameter of each axis
+        self.nuAxes = np.broadcast_to(self.nuFlag, self.nDim).astype(bool)
+        self.betaAxes = np.broadcast_to(self.beta, self.nDim).astype(float)
+
+        d = self.nDim
+        allPts, evenPts, oddPts = slice(None), slice(None, None, 2), slice(1, -1, 2)
+
+        # Views of the grid points, and of the two neighbours along each axis, used by laplace().
+        # Neighbours are indexed in the array with ghost points.
+        self.lapIdx = [(axisView(d, k, slice(0, -2), self.inner[1], self.inner[1]),
+                        axisView(d, k, slice(2, None), self.inner[1], self.inner[1])) for k in range(d)]
+
+        # Views used by restrict() along each axis in turn, of the coarse points and of their two neighbours.
+        # Along the axes done before, only the coarse points are taken.
+        self.rstIdx = [(axisView(d, k, oddPts, oddPts), axisView(d, k, slice(0, -2, 2), oddPts),
+                        axisView(d, k, slice(2, None, 2), oddPts)) for k in range(d)]
+        self.crsIdx = (Ellipsis,) + (oddPts,)*d
+
+        # Views of the points on both walls of each axis, in an array without ghost points
+        self.wallIdx = [(axisView(d, k, 0), axisView(d, k, -1)) for k in range(d)]
+
+        # Views used by prolong() along each axis in turn, of the mid-points and of their two neighbours.
+        # These index the interior points, and along the axes yet to be done, only the coarse points are taken.
+        self.prlIdx = [(axisView(d, k, slice(1, None, 2), allPts, evenPts), axisView(d, k, slice(0, -1, 2), allPts, evenPts),
+                        axisView(d, k, slice(2, None, 2), allPts, evenPts)) for k in range(d)]
+        self.evenIdx = (Ellipsis,) + (evenPts,)*d
+
+        # Views used by gsSweep() for each of the two colours of red-black ordering.
+        # The points of a colour are split into 2^(nDim - 1) sets, each of which takes alternate points
+        # along every axis, starting from the parity sPar. For each set, the views of the points with ghost points,
+        # without ghost points, and of the two neighbours along each axis with the coefficients of that axis are kept.
+        # Red points, whose interior indices add up to an even number, are updated first, as in mgLite.py.
+        self.rbIdx = [[], []]
+        for sPar in itertools.product([0, 1], repeat=d):
+            pIdx = (Ellipsis,) + tuple(slice(1 + x, -1, 2) for x in sPar)
+            rIdx = (Ellipsis,) + tuple(slice(x, None, 2) for x in sPar)
+            nIdx = [(pIdx[:k+1] + (slice(x, -2, 2),) + pIdx[k+2:], pIdx[:k+1] + (slice(2 + x, None, 2),) + pIdx[k+2:], slice(x, None, 2))
+                    for k, x in enumerate(sPar)]
+
+            self.rbIdx[sum(sPar) % 2].append((pIdx, rIdx, nIdx))
+
+        # Views of the ghost points at both walls of each axis, and of the points whose mirror images they are
+        self.bcIdx = [(axisView(d, k, 0), axisView(d, k, 2), axisView(d, k, -1), axisView(d, k, -3)) for k in range(d)]
+
+
+    # Estimate of the memory, in bytes, taken by the grid hierarchy and the arrays of the solver for bSize RHS
+    def memEstimate(self, bSize=1):
+        nSum = sum(x**self.nDim for x in self.N)
+        gSum = sum((x + 2)**self.nDim for x in self.N)
+        nFine, gFine = self.N[0]**self.nDim, (self.N[0] + 2)**self.nDim
+
+        # rData, lTemp and wTemp, along with pData, sData and iTemp, which include ghost points, and cData of Chebyshev smoother.
+        # Arrays of the finest level take no memory if they are mapped to files.
+        iSize = 4 if self.mixFlag else 8
+        nArr = 4 if self.smType == 'CHEB' else 3
+        memVal = bSize*iSize*(nArr*nSum + 3*gSum)
+        if self.mmapDir:
+            memVal -= bSize*iSize*(nArr*nFine + 3*gFine)
+
+        # Jacobi coefficients, and the diagonal of the operator on stretched grids
+        gArr = 2 if self.nuAxes.any() else 1
+        memVal += 8*gArr*nSum
+        if self.mixFlag:
+            memVal += 4*gArr*nSum
+
+        # Analytic solution of the test case
+        memVal += 8*nFine
+
+        # Solution and RHS kept apart from the cycles
+        if self.sepSoln and not self.mmapDir:
+            memVal += bSize*8*(gFine + nFine)
+
+        return memVal
+
+
+    # Smoothens the solution at the current level with one sweep of red-black Gauss-Seidel, whatever rbFlag is,
+    # since lexicographic ordering can't be vectorized. All points of a set of each colour are updated at once,
+    # as P = (R - sum of aW*P_west + aE*P_east)/aD, where aD is the diagonal of the operator.
+    # wTemp holds intermediate values.
+    def gsSweep(self, rbFlag=True):
+        vLev = self.vLev
+        pLev, rLev, wTemp = self.pData[vLev], self.rData[vLev], self.wTemp[vLev]
+        aW, aD, aE = self.lapCoef[vLev]
+
+        for cIdx in self.rbIdx:
+            for pIdx, rIdx, nIdx in cIdx:
+                pSub, wSub = pLev[pIdx], wTemp[rIdx]
+                pSub.fill(0.0)
+
+                if self.nuAxes.any():
+                    for k, (wIdx, eIdx, cSlice) in enumerate(nIdx):
+                        np.multiply(aW[k][cSlice], pLev[wIdx], out=wSub)
+                        pSub += wSub
+                        np.multiply(aE[k][cSlice], pLev[eIdx], out=wSub)
+                        pSub += wSub
+
+                    np.subtract(rLev[rIdx], pSub, out=pSub)
+                    pSub /= aD[rIdx]
+                else:
+                    # For uniform grid, the coefficients are the same along all axes
+                    for wIdx, eIdx, cSlice in nIdx:
+                        pSub += pLev[wIdx]
+                        pSub += pLev[eIdx]
+
+                    np.multiply(rLev[rIdx], self.hx2[vLev], out=wSub)
+                    pSub -= wSub
+                    pSub *= 0.5/self.nDim
+
+
+    # Solves the coarsest level directly, when Gauss-Seidel fails to converge there, as on strongly stretched grids.
+    # The ghost points are eliminated as in mgLite.py, and the operator is then the Kronecker sum of the tridiagonal
+    # operators along each axis. Its inverse is computed once, if the level has at most maxDirect points.
+    def solveDirect(self):
+        vLev = self.vLev
+        n, d = self.N[vLev], self.nDim
+
+        if n**d > maxDirect:
+            self.writeOut("MAYDAY! Iterative solver refuses to converge, and the coarsest level is too large to solve directly.\n")
+            return 1
+
+        aW, aD, aE = self.lapCoef[vLev]
+        if vLev not in self.dirInv:
+            aMat = np.zeros((n**d, n**d))
+            for k in range(d):
+                kW, kE = aW[k].ravel().astype(np.float64), aE[k].ravel().astype(np.float64)
+                gW, gC, gE = mgSolver.elimGhosts((kW, -(kW + kE), kE))
+
+                kMat = np.diag(gC) + np.diag(gW[1:], -1) + np.diag(gE[:-1], 1)
+                aMat += np.kron(np.eye(n**k), np.kron(kMat, np.eye(n**(d - k - 1))))
+
+            self.dirInv[vLev] = np.linalg.inv(aMat)
+
+        # For non-homogenous BC, the wall values are moved to the RHS
+        dVec = np.array(self.rData[vLev], dtype=np.float64)
+        if not self.zeroBC:
+            fInner = (Ellipsis,) + (slice(1, -1),)*(d - 1)
+            for k, (fLo, fHi) in enumerate(self.pFace[vLev]):
+                dVec[axisView(d, k, 0)] -= aW[k].ravel()[0]*fLo[fInner]
+                dVec[axisView(d, k, -1)] -= aE[k].ravel()[-1]*fHi[fInner]
+
+        bShape = dVec.shape[:dVec.ndim - d]
+        pVec = dVec.reshape(bShape + (-1,)) @ self.dirInv[vLev].T
+        self.pData[vLev][self.inner] = pVec.reshape(dVec.shape)
+        self.imposeBC(self.pData[vLev])
+
+        return 0
+
+
+    # Full weighted restriction, which is that of mgLite.py along each axis in turn.
+    # It is done in place in iTemp, whose ghost points are always 0, and only the coarse points
+    # of the axes already done are restricted along the next axis.
+    # The points on the walls hold the BC, and the diagonal of their rows in R.A.P is twice that of the
+    # operator discretized on the coarser level. In 1D, these rows are not coupled to other points, and
+    # the smoother corrects them anyway. In more dimensions, they are coupled along the walls, and the
+    # coarser level would correct them twice over, which slows down the cycles more and more as VDepth grows.
+    # So their residual is halved once for each wall that they lie on.
+    def restrict(self):
+        pLev = self.vLev
+        self.vLev += 1
+
+        iTemp = self.iTemp[pLev]
+        for mIdx, wIdx, eIdx in self.rstIdx:
+            iMid = iTemp[mIdx]
+            iMid *= 2.0
+            iMid += iTemp[wIdx]
+            iMid += iTemp[eIdx]
+            iMid *= 0.25
+
+        rCoarse = self.rData[self.vLev]
+        np.copyto(rCoarse, iTemp[self.crsIdx])
+        for wLo, wHi in self.wallIdx:
+            rCoarse[wLo] *= 0.5
+            rCoarse[wHi] *= 0.5
+
+
+    # Since restrict() works in place on the residual in iTemp, nothing is saved by fusing the two steps in more than 1D
+    def restrictResidual(self):
+        self.calcResidual()
+        self.restrict()
+
+
+    # Bilinear (2D) or trilinear (3D) interpolation, which is the linear interpolation of mgLite.py along each axis in turn.
+    # The coarse points are transferred as they are, and the mid-points along each axis are then filled in place,
+    # at all points along the axes already done, and at the coarse points along the axes yet to be done.
+    def prolong(self):
+        pLev = self.vLev
+        self.vLev -= 1
+
+        pFine = self.pData[self.vLev][self.inner]
+        np.copyto(pFine[self.evenIdx], self.pData[pLev][self.inner])
+
+        for mIdx, wIdx, eIdx in self.prlIdx:
+            pMid = pFine[mIdx]
+            np.add(pFine[wIdx], pFine[eIdx], out=pMid)
+            pMid *= 0.5
+
+
+    # Computes the laplacian of function at the finest level in double precision, using aTemp as workspace
+    def fineLaplace(self, function, laplacian):
+        return self.applyStencil(self.refCoef, function, laplacian, self.aTemp)
+
+
+    # Computes the laplacian of function
+    # The result is written to laplacian if it is given, and a new array is allocated otherwise
+    def laplace(self, function, laplacian=None):
+        vLev = self.vLev
+
+        if laplacian is None:
+            laplacian = np.zeros(function.shape[:function.ndim - self.nDim] + (self.N[vLev],)*self.nDim)
+
+        if self.nuAxes.any():
+            return self.applyStencil(self.lapCoef[vLev], function, laplacian, self.wTemp[vLev])
+
+        # For uniform grid
+        wIdx, eIdx = self.lapIdx[0]
+        np.add(function[wIdx], function[eIdx], out=laplacian)
+        for wIdx, eIdx in self.lapIdx[1:]:
+            laplacian += function[wIdx]
+            laplacian += function[eIdx]
+
+        wTemp = self.wTemp[vLev]
+        np.multiply(function[self.inner], 2.0*self.nDim, out=wTemp)
+        laplacian -= wTemp
+        laplacian /= self.hx2[vLev]
+
+        return laplacian
+
+
+    # Applies the stencil aCoef = (aW, aD, aE), where aW and aE hold the coefficients along each axis,
+    # to function, and writes the result to laplacian. wTemp is used as workspace.
+    def applyStencil(self, aCoef, function, laplacian, wTemp):
+        aW, aD, aE = aCoef
+
+        np.multiply(aD, function[self.inner], out=laplacian)
+        for k, (wIdx, eIdx) in enumerate(self.lapIdx):
+            np.multiply(aW[k], function[wIdx], out=wTemp)
+            laplacian += wTemp
+            np.multiply(aE[k], function[eIdx], out=wTemp)
+            laplacian += wTemp
+
+        return laplacian
+
+
+    # Initialize the grid, which is fetched from the cache of mgLite.py if a solver with the same grid was created before
+    def initGrid(self):
+        gKey = ('ND', self.nDim, self.N[0], self.VDepth, tuple(b if f else None for f, b in zip(self.nuAxes, self.betaAxes)))
+
+        gData = mgSolver.hierCache.get(gKey) if mgSolver.cacheSize else None
+        if gData is None:
+            gData = self.makeGrid()
+
+            # Cached arrays are shared between solvers, so they must never be modified in place
+            lockArrays([gData['xPts'], gData['xixx'], gData['xix2'], gData['lapCoef'], gData['jacCoef']])
+
+            if mgSolver.cacheSize:
+                mgSolver.hierCache.put(gKey, gData)
+
+        self.xPts, self.xixx, self.xix2 = gData['xPts'], gData['xixx'], gData['xix2']
+        self.lapCoef, self.jacCoef = gData['lapCoef'], gData['jacCoef']
+
+        # The points of each level lie on alternate points of the finer one
+        self.xfer = [None]*self.VDepth
+
+        # Double precision stencil at the finest level, used when the solution is kept apart
+        self.refCoef = self.lapCoef[0]
+
+        # Inverse of the operator of the coarsest level, computed by solveDirect() when first needed
+        self.dirInv = {}
+
+        # In mixed precision mode, the cycles use single precision copies of the coefficients
+        if self.mixFlag:
+            self.lapCoef = [([x.astype(np.float32) for x in aW], aD.astype(np.float32), [x.astype(np.float32) for x in aE])
+                            for aW, aD, aE in self.lapCoef]
+            self.jacCoef = [x.astype(np.float32) for x in self.jacCoef]
+
+
+    # Compute the grid points and metric terms along each axis, and the operator coefficients, at all levels.
+    # xPts, xixx and xix2 hold a list of arrays, one for each axis, at each level.
+    def makeGrid(self):
+        N, d = self.N, self.nDim
+
+        # Uniform grid default values
+        xPts = [[np.linspace(0.0, 1.0, n) for k in range(d)] for n in N]
+        xixx = [[np.zeros(n) for k in range(d)] for n in N]
+        xix2 = [[np.ones(n) for k in range(d)] for n in N]
+
+        # Overwrite the values of stretched axes with those of the tangent-hyperbolic grid.
+        # Coarser grids lie on the finer grid, and simply use the values at every even index of the finer grid array.
+        for k in range(d):
+            if self.nuAxes[k]:
+                xPts[0][k], xi_x, xixx[0][k], xix2[0][k] = mgSolver.tanhGrid(N[0], self.betaAxes[k])
+                for i in range(1, len(N)):
+                    xPts[i][k], xixx[i][k], xix2[i][k] = xPts[i-1][k][::2], xixx[i-1][k][::2], xix2[i-1][k][::2]
+
+        # Coefficients of the stencil at each level, as (aW, aD, aE).
+        # aW and aE are lists of the coefficients along each axis, shaped to broadcast along that axis,
+        # and aD is the diagonal, which is the sum of the diagonals along all the axes.
+        # On uniform grids, aD is the same at all points, and is kept as a single value.
+        # The weight of damped Jacobi smoother at each point is set as in mgLite.py, with the bound eMax from Gershgorin's theorem.
+        # The errors that the coarser levels cannot correct have eigenvalues in [eMax/(2*nDim), eMax], which are damped the most
+        # by the weight 4*nDim/((2*nDim + 1)*eMax). This is 4/(3*eMax) in 1D, and the optimal 4/5 and 6/7 on uniform grids in 2D and 3D.
+        lapCoef, jacCoef = [], []
+        for i, n in enumerate(N):
+            hx, hx2 = self.hx[i], self.hx2[i]
+
+            aW, aD, aE, aOff = [], 0.0, [], 0.0
+            for k in range(d):
+                aShape = (n,) + (1,)*(d - k - 1)
+
+                kW = xix2[i][k]/hx2 - xixx[i][k]/(2.0*hx)
+                kC = -2.0*xix2[i][k]/hx2
+                kE = xix2[i][k]/hx2 + xixx[i][k]/(2.0*hx)
+
+                aW.append(kW.reshape(aShape))
+                aE.append(kE.reshape(aShape))
+                aD = aD + kC.reshape(aShape)
+
+                gW, gC, gE = mgSolver.elimGhosts((kW, kC, kE))
+                aOff = aOff + (np.abs(gW) + np.abs(gE)).reshape(aShape)
+
+            if not self.nuAxes.any():
+                aD = np.array(-2.0*d/hx2)
+
+            eMax = 1.0 + aOff/np.abs(aD)
+            jacCoef.append(np.minimum(1.0, 4.0*d/((2.0*d + 1.0)*eMax))/aD)
+            lapCoef.append((aW, aD, aE))
+
+        return {'xPts': xPts, 'xixx': xixx, 'xix2': xix2, 'lapCoef': lapCoef, 'jacCoef': jacCoef}
+
+
+    ############################## BOUNDARY CONDITION ###############################
+
+
+    # Imposes Dirichlet BC on P, at both walls of each axis.
+    # The wall values vary along the walls, and are kept for each level in pFace.
+    def imposeBC(self, P):
+        pFace = self.pFace[self.N.index(P.shape[-1] - 2)]
+
+        for (gLo, mLo, gHi, mHi), (fLo, fHi) in zip(self.bcIdx, pFace):
+            if self.zeroBC:
+                # Homogenous BC
+                np.negative(P[mLo], out=P[gLo])
+                np.negative(P[mHi], out=P[gHi])
+            else:
+                # Non-homogenous BC
+                np.subtract(fLo, P[mLo], out=P[gLo])
+                np.subtract(fHi, P[mHi], out=P[gHi])
+
+
+    ############################### PLOTTING ROUTINE ################################
+
+
+    # plotResult() plots the solution along the first axis, on the line through the middle of the other axes.
+    # The grid has an odd number of points along each axis, so the line passes through the centre of the domain.
+    def plotLine(self):
+        mIdx = self.N[0]//2
+        pLine = self.pSoln[(Ellipsis, slice(1, -1)) + (mIdx + 1,)*(self.nDim - 1)]
+
+        return self.xPts[0][0], self.pAnlt[(slice(None),) + (mIdx,)*(self.nDim - 1)], pLine.reshape(-1, self.N[0])
+
+
+    ############################### TEST CASE DETAIL ################################
+
+
+    # Calculate the analytical solution and its corresponding Dirichlet BC values
+    def initDirichlet(self):
+        # Compute analytical solution, (r^2)/(2*nDim)
+        self.pAnlt = testSoln(self.xPts[0])
+
+        # Twice the value of P at the walls of each axis, at each level, according to analytical solution.
+        # As in 1D, the wall lies on the first and last interior points. The values are also set at the ghost
+        # points of the other axes, by taking the grid points next to them, though they are never used.
+        self.pFace = []
+        for xList in self.xPts:
+            xGhost = [np.pad(x, 1, mode='edge') for x in xList]
+
+            fList = []
+            for k in range(self.nDim):
+                fLo = 2.0*testSoln(xGhost[:k] + [xList[k][:1]] + xGhost[k+1:])
+                fHi = 2.0*testSoln(xGhost[:k] + [xList[k][-1:]] + xGhost[k+1:])
+                fList.append((np.take(fLo, 0, axis=k), np.take(fHi, 0, axis=k)))
+
+            self.pFace.append(fList)
+
+
+############################## THAT'S IT, FOLKS!! ###############################
+
+if __name__ == '__main__':
+    main()
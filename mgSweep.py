@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+
+#################################################################################
+# MG-Lite
+# 
+# Copyright (C) 2020, Roshan J. Samuel
+#
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     1. Redistributions of source code must retain the above copyright
+#        notice, this list of conditions and the following disclaimer.
+#     2. Redistributions in binary form must reproduce the above copyright
+#        notice, this list of conditions and the following disclaimer in the
+#        documentation and/or other materials provided with the distribution.
+#     3. Neither the name of the copyright holder nor the
+#        names of its contributors may be used to endorse or promote products
+#        derived from this software without specific prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#################################################################################
+
+# Import all necessary modules
+import csv
+import time
+import itertools
+import numpy as np
+import mgLite as mgSolver
+from concurrent.futures import ProcessPoolExecutor
+
+############################### GLOBAL CONSTANTS ################################
+
+# Parameter grid swept when this file is run directly.
+# Every combination of the values listed below is solved once.
+# Parameters that are not listed take the default values set in mgLite.py
+sweepParams = {'sInd': [8, 10, 12],
+               'VDepth': [4, 7],
+               'preSm': [2, 3],
+               'pstSm': [2, 3],
+               'nuFlag': [False, True],
+               'beta': [1.0, 2.0]}
+
+# Names of the files to which the results of sweep are written
+csvName = "mgSweep.csv"
+npzName = "mgSweep.npz"
+
+# Number of worker processes. Each run uses one core, and None uses all of them
+maxWorkers = None
+
+# Parameters of the tiny solves run by each worker before its first case.
+# Between them, they call every compiled kernel used by solvers in double precision.
+warmParams = [{}, {'fuseFlag': True}, {'nuFlag': True, 'fuseFlag': True}, {'galFlag': True}, {'smType': 'RBGS'}]
+
+##################################### MAIN ######################################
+
+def main():
+    runSweep(sweepParams, csvName, npzName, maxWorkers)
+
+
+# A console that swallows all output of the solver, so that parallel runs don't clutter the terminal
+class nullConsole:
+    def updateTEdit(self, cOutString):
+        pass
+
+
+# Expand a dictionary of parameter lists into a list of dictionaries, one for every combination.
+# Combinations that would make an invalid hierarchy, i.e., whose coarsest level has less than 3 points, are dropped.
+# beta has no effect on a uniform grid, so only the first value of beta is run with nuFlag = False.
+def sweepGrid(paramGrid):
+    pNames = list(paramGrid.keys())
+
+    caseList = []
+    for pValues in itertools.product(*[paramGrid[x] for x in pNames]):
+        mgParams = dict(zip(pNames, pValues))
+
+        # The grid sizes are found just as multigridSolver.initGlobals() does
+        nPts = mgParams.get('nPts', mgSolver.nPts)
+        nFine = nPts if nPts else 2**mgParams.get('sInd', mgSolver.sInd) + 1
+        try:
+            mgSolver.levelSizes(nFine, mgParams.get('VDepth', mgSolver.VDepth))
+        except ValueError:
+            continue
+
+        if 'beta' in mgParams and not mgParams.get('nuFlag', mgSolver.nuFlag) and mgParams['beta'] != paramGrid['beta'][0]:
+            continue
+
+        caseList.append(mgParams)
+
+    return caseList
+
+
+# Runs once in each worker process, before its first case.
+# Numba is imported, and the compiled kernels are loaded from the disk cache by a few tiny solves,
+# so that this isn't counted in the timings of the first case run by the worker.
+def warmWorker():
+    if mgSolver.loadKernels():
+        for mgParams in warmParams:
+            mgRun = mgSolver.multigridSolver(nullConsole(), sInd=4, VDepth=2, vcCnt=1, **mgParams)
+            mgRun.multigrid(np.ones(mgRun.N[0] + 2))
+
+
+# Solve the test case once with the given parameters and collect the results.
+# This is the function that runs in each worker process.
+# If the solver raises an error, the case is recorded with NaN results and the error message,
+# so that a single bad case doesn't throw away the results of the whole sweep.
+def runCase(mgParams):
+    try:
+        t0 = time.perf_counter()
+        mgRun = mgSolver.multigridSolver(nullConsole(), **mgParams)
+        t1 = time.perf_counter()
+
+        mgLHS = mgRun.multigrid(np.ones(mgRun.N[0] + 2))
+        t2 = time.perf_counter()
+
+        errVal = float(mgRun.computeError(mgLHS))
+    except Exception as runErr:
+        return {'errVal': np.nan,
+                'rConv': np.zeros(0),
+                'setupTime': np.nan,
+                'solveTime': np.nan,
+                'errMsg': "{0:s}: {1:s}".format(type(runErr).__name__, str(runErr))}
+
+    return {'errVal': errVal,
+            'rConv': mgRun.rConv,
+            'setupTime': t1 - t0,
+            'solveTime': t2 - t1,
+            'errMsg': ""}
+
+
+# Run all the combinations of parameters in paramGrid across a pool of processes,
+# and write the results as a table to csvFile and/or npzFile.
+# The list of results is also returned, in the same order as sweepGrid(paramGrid).
+def runSweep(paramGrid, csvFile=None, npzFile=None, numWorkers=None):
+    caseList = sweepGrid(paramGrid)
+
+    print("Running {0:d} cases of the sweep\n".format(len(caseList)))
+
+    with ProcessPoolExecutor(max_workers=numWorkers, initializer=warmWorker) as ppExec:
+        resList = list(ppExec.map(runCase, caseList))
+
+    for mgParams, mgRes in zip(caseList, resList):
+        if mgRes['errMsg']:
+            print("Case {0:s} failed with {1:s}".format(str(mgParams), mgRes['errMsg']))
+
+    pNames = list(paramGrid.keys())
+    if csvFile:
+        writeCSV(csvFile, pNames, caseList, resList)
+
+    if npzFile:
+        writeNPZ(npzFile, pNames, caseList, resList)
+
+    return resList
+
+
+# Write one row per case, with the residual history written as a space separated list
+def writeCSV(csvFile, pNames, caseList, resList):
+    with open(csvFile, 'w', newline='') as cFile:
+        cWriter = csv.writer(cFile)
+        cWriter.writerow(pNames + ['errVal', 'finalRes', 'setupTime', 'solveTime', 'rConv'])
+
+        for mgParams, mgRes in zip(caseList, resList):
+            # The residual history is empty if the very first V-cycle failed
+            rConv = mgRes['rConv']
+            finalRes = rConv[-1] if len(rConv) else np.nan
+
+            cWriter.writerow([mgParams[x] for x in pNames] +
+                             [mgRes['errVal'], finalRes, mgRes['setupTime'], mgRes['solveTime'],
+                              " ".join("{0:.6e}".format(x) for x in rConv)])
+
+    print("Results of sweep written to " + csvFile)
+
+
+# Write every column of the table as an array.
+# Residual histories of different lengths are padded with NaN in rConv.
+def writeNPZ(npzFile, pNames, caseList, resList):
+    maxLen = max([len(x['rConv']) for x in resList], default=0)
+    rConv = np.full((len(resList), maxLen), np.nan)
+    for i, mgRes in enumerate(resList):
+        rConv[i, :len(mgRes['rConv'])] = mgRes['rConv']
+
+    npzData = {x: np.array([y[x] for y in caseList]) for x in pNames}
+    for rName in ['errVal', 'setupTime', 'solveTime']:
+        npzData[rName] = np.array([x[rName] for x in resList])
+
+    np.savez(npzFile, rConv=rConv, **npzData)
+
+    print("Results of sweep written to " + npzFile)
+
+
+############################## THAT'S IT, FOLKS!! ###############################
+
+if __name__ == '__main__':
+    main()
+
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+
+#################################################################################
+# MG-Lite
+#
+# Copyright (C) 2020, Roshan J. Samuel
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     1. Redistributions of source code must retain the above copyright
+#        notice, this list of conditions and the following disclaimer.
+#     2. Redistributions in binary form must reproduce the above copyright
+#        notice, this list of conditions and the following disclaimer in the
+#        documentation and/or other materials provided with the distribution.
+#     3. Neither the name of the copyright holder nor the
+#        names of its contributors may be used to endorse or promote products
+#        derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#################################################################################
+
+# Import all necessary modules
+# The kernels compiled with Numba must give exactly the same results as the NumPy kernels.
+# All the tests are skipped if Numba is not installed. Run them with: python -m pytest test_mgKernels.py
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+import mgLite as mgSolver
+
+##################################### TESTS #####################################
+
+# The cases and kernels are those checked by mgLite.py --verify, and each combination is a separate test here
+kernelNames = [x[0] for x in mgSolver.verifyKernels]
+
+
+# One solver with the NumPy kernels and one with the compiled kernels
+def makeSolvers(mgParams):
+    mgRuns = mgSolver.backendPair(mgParams)
+    assert [x.useJit for x in mgRuns] == [False, True]
+
+    return mgRuns
+
+
+# Each kernel is called by both solvers on the same random data, for a single RHS and a batch of RHS, with both types of BC
+@pytest.mark.parametrize("mgParams", mgSolver.verifyCases, ids=str)
+@pytest.mark.parametrize("kIndex", range(len(kernelNames)), ids=kernelNames)
+@pytest.mark.parametrize("bShape", [(), (3,)], ids=["single", "batch"])
+@pytest.mark.parametrize("zeroBC", [False, True])
+def test_kernel(mgParams, kIndex, bShape, zeroBC):
+    kName, vLev, kFunc = mgSolver.verifyKernels[kIndex]
+
+    mgRuns = makeSolvers(mgParams)
+    for mgRun in mgRuns:
+        mgRun.initVariables(bShape)
+
+    assert mgSolver.sameKernel(mgRuns, vLev, kFunc, zeroBC)
+
+
+# Both solvers must give the same solution and residual history for the test case
+@pytest.mark.parametrize("mgParams", mgSolver.verifyCases, ids=str)
+def test_solve(mgParams):
+    assert mgSolver.sameSolve(makeSolvers(mgParams))
+
+
+# In mixed precision, the compiled kernels work on single precision arrays, and may differ from NumPy in the last bit.
+# Since the solution is corrected in double precision, both solvers must still give nearly the same solution.
+@pytest.mark.parametrize("mgParams", mgSolver.verifyCases, ids=str)
+def test_mixed(mgParams):
+    mgRuns = makeSolvers(dict(mgParams, mixFlag=True))
+    mgLHS = [x.multigrid(np.ones(x.N[0] + 2)).copy() for x in mgRuns]
+
+    np.testing.assert_allclose(*mgLHS, rtol=1e-6)
+
+
+############################## THAT'S IT, FOLKS!! ###############################
@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+
+#################################################################################
+# MG-Lite
+#
+# Copyright (C) 2020, Roshan J. Samuel
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     1. Redistributions of source code must retain the above copyright
+#        notice, this list of conditions and the following disclaimer.
+#     2. Redistributions in binary form must reproduce the above copyright
+#        notice, this list of conditions and the following disclaimer in the
+#        documentation and/or other materials provided with the distribution.
+#     3. Neither the name of the copyright holder nor the
+#        names of its contributors may be used to endorse or promote products
+#        derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#################################################################################
+
+# Import all necessary modules
+# The solver of mgLiteND.py must solve the test case in 2D and 3D with all its options.
+# Run these tests with: python -m pytest test_mgLiteND.py
+import numpy as np
+import pytest
+
+import mgLite as mgSolver
+import mgLiteND as mgSolverND
+
+################################## TEST CASES ###################################
+
+# Number of points along each axis, for each number of dimensions
+sizeList = {2: 6, 3: 4}
+
+caseList = [{'smType': 'RBGS'}, {'smType': 'JAC'}, {'smType': 'CHEB'},
+            {'smType': 'RBGS', 'nuFlag': True, 'beta': 1.5}, {'smType': 'RBGS', 'nuFlag': True, 'beta': [1.5, 0.8]},
+            {'smType': 'RBGS', 'fmgFlag': True}, {'smType': 'RBGS', 'cycType': 'W'}]
+
+
+##################################### TESTS #####################################
+
+# A solver of the test case, with a tight tolerance on the residual
+def makeSolver(nDim, **mgParams):
+    mgParams = dict({'sInd': sizeList[nDim], 'VDepth': 3, 'vcCnt': 60, 'resTol': 1e-9}, **mgParams)
+
+    # A value given for each axis is repeated for the remaining axes
+    if isinstance(mgParams.get('beta'), list):
+        mgParams['beta'] = mgParams['beta'] + mgParams['beta'][-1:]*(nDim - len(mgParams['beta']))
+
+    return mgSolverND.multigridSolverND(mgSolver.textConsole(None), nDim=nDim, **mgParams)
+
+
+# The residual must fall below the tolerance, and the error must be within that of the discretization.
+# The walls lie on the first and last interior points, which puts the error at a fraction of hx^2.
+@pytest.mark.parametrize("mgParams", caseList, ids=str)
+@pytest.mark.parametrize("nDim", [2, 3])
+def test_solve(nDim, mgParams):
+    mgRun = makeSolver(nDim, **mgParams)
+    mgLHS = mgRun.multigrid(np.ones((mgRun.N[0] + 2,)*nDim))
+
+    assert mgRun.tolMet and not mgRun.cycFail
+    assert np.amax(np.abs(mgRun.computeError(mgLHS))) < 0.5*mgRun.hx[0]**2
+
+
+# Each RHS of a batch must be solved exactly as it is when solved alone
+@pytest.mark.parametrize("nDim", [2, 3])
+def test_batch(nDim):
+    mgRuns = [makeSolver(nDim) for x in range(2)]
+    gShape = (mgRuns[0].N[0] + 2,)*nDim
+
+    mgLHS = mgRuns[0].multigrid(np.ones(gShape)).copy()
+    bLHS = mgRuns[1].multigrid(np.ones((2,) + gShape))
+
+    np.testing.assert_array_equal(bLHS[0], mgLHS)
+    np.testing.assert_array_equal(bLHS[1], mgLHS)
+
+
+# Mixed precision must reach the same residual as double precision
+@pytest.mark.parametrize("nDim", [2, 3])
+def test_mixed(nDim):
+    mgRun = makeSolver(nDim, mixFlag=True)
+    mgLHS = mgRun.multigrid(np.ones((mgRun.N[0] + 2,)*nDim))
+
+    assert mgRun.tolMet
+    assert np.amax(np.abs(mgRun.computeError(mgLHS))) < 0.5*mgRun.hx[0]**2
+
+
+# Options available only in 1D must be refused
+@pytest.mark.parametrize("mgParams", [{'galFlag': True}, {'csType': 'TDMA'}, {'solMode': 'BiCGStab'}, {'nPts': 60}], ids=str)
+def test_refused(mgParams):
+    with pytest.raises(ValueError):
+        makeSolver(2, **mgParams)
+
+
+# The solution and its error are plotted along the line through the centre of the domain
+@pytest.mark.parametrize("nDim", [2, 3])
+def test_plotLine(nDim):
+    mgRun = makeSolver(nDim)
+    mgRun.multigrid(np.ones((mgRun.N[0] + 2,)*nDim))
+
+    xPts, pAnlt, pSoln = mgRun.plotLine()
+    assert xPts.shape == pAnlt.shape == (mgRun.N[0],)
+    assert pSoln.shape == (1, mgRun.N[0])
+    np.testing.assert_allclose(pSoln[0], pAnlt, atol=0.5*mgRun.hx[0]**2)
+
+    plt = pytest.importorskip("matplotlib.pyplot")
+    for plotType in range(3):
+        mgRun.plotResult(plotType)
+    plt.close('all')
+
+
+############################## THAT'S IT, FOLKS!! ###############################